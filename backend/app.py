@@ -17,11 +17,11 @@ import time
 from blog_link_checker import router as blog_link_checker_router
 from blog_link_checker_stream import router as blog_link_checker_stream_router
 from schema_markup_checker import router as schema_markup_checker_router
-from schema_markup_checker_stream import router as schema_markup_checker_stream_router
+from schema_markup_checker_stream import router as schema_markup_checker_stream_router, lifespan as schema_markup_checker_stream_lifespan
 from heading_structure_analyzer import router as heading_structure_router
 from schema_generator_v2 import router as schema_v2_router
 
-app = FastAPI()
+app = FastAPI(lifespan=schema_markup_checker_stream_lifespan)
 
 # Include routers
 app.include_router(blog_link_checker_router)
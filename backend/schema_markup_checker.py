@@ -2,17 +2,75 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import soupsieve
 import json
+import orjson
 import re
+from collections import Counter, defaultdict, deque
 from urllib.parse import urlparse, urljoin
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import asyncio
+import threading
+import time
 import xml.etree.ElementTree as ET
 
 router = APIRouter()
 
+# Shared HTTP session so keep-alive connections and TLS sessions are reused
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# Request headers shared by every page and sitemap fetch
+_BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+_SITEMAP_HEADERS = {
+    'User-Agent': _BROWSER_HEADERS['User-Agent'],
+    'Accept': 'application/xml,text/xml,*/*;q=0.8'
+}
+
+# Handle different sitemap formats
+_SITEMAP_NAMESPACES = {
+    'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9',
+    'image': 'http://www.google.com/schemas/sitemap-image/1.1'
+}
+
+# Schema types that matter most for AI search
+_AI_ESSENTIAL_TYPES = frozenset({
+    'Article', 'NewsArticle', 'BlogPosting', 'WebPage',
+    'Product', 'Review', 'AggregateRating',
+    'Organization', 'LocalBusiness', 'Person',
+    'FAQPage', 'HowTo', 'Recipe', 'Event',
+    'BreadcrumbList', 'VideoObject', 'ImageObject'
+})
+
+# Minimum spacing in seconds between requests to the same host
+PER_HOST_DELAY = 0.1
+
+# Cache of analyzed pages keyed by URL (valid for 15 minutes)
+SCHEMA_CACHE_TTL = 900
+SCHEMA_CACHE_MAX_SIZE = 4096
+_schema_cache: Dict[str, Dict] = {}
+_schema_cache_lock = threading.Lock()
+
+# Compiled once so each page is matched without rebuilding find_all filters
+_JSON_LD_SELECTOR = soupsieve.compile('script[type="application/ld+json"]')
+_ITEMSCOPE_SELECTOR = soupsieve.compile('[itemscope]')
+_ITEMPROP_SELECTOR = soupsieve.compile('[itemprop]')
+_TYPEOF_SELECTOR = soupsieve.compile('[typeof]')
+_PROPERTY_SELECTOR = soupsieve.compile('[property]')
+
 class SchemaCheckRequest(BaseModel):
     urls: Union[List[str], str]  # Can be list of URLs or sitemap URL
     max_workers: int = 5
@@ -29,6 +87,43 @@ class SchemaResult(BaseModel):
     score: int
     checked_at: str
 
+# Properties that make a JSON-LD node useful for rich results
+_ESSENTIAL_PROPS = frozenset({
+    'name', 'description', 'image', 'author',
+    'datePublished', 'dateModified', 'headline'
+})
+
+# Bonus points for schema types that AI Search relies on
+_TYPE_BONUS = {
+    'BreadcrumbList': 15,
+    'FAQPage': 20,
+    'Review': 15,
+    'AggregateRating': 15
+}
+
+def _score_author(author) -> tuple:
+    """Score a JSON-LD author property, returns (points, recommendation)"""
+    if not isinstance(author, dict):
+        return 0, None
+    if author.get('@type') == 'Person':
+        return 10, None
+    return 0, "ระบุ author เป็น Person หรือ Organization Schema"
+
+def _score_image(image) -> tuple:
+    """Score a JSON-LD image property, returns (points, recommendation)"""
+    if isinstance(image, (list, dict)):
+        return 10, None
+    return 0, "เพิ่มข้อมูล image แบบ structured (URL, width, height)"
+
+_PROPERTY_SCORERS = {
+    'author': _score_author,
+    'image': _score_image
+}
+
+# URL / title patterns for CollectionPage and HowTo detection
+_COLLECTION_PATH_RE = re.compile(r'/(?:category|tag|archive)/', re.IGNORECASE)
+_HOWTO_TITLE_RE = re.compile(r'how to|guide|tutorial|วิธี', re.IGNORECASE)
+
 def generate_schema_script(url: str, page_content: BeautifulSoup) -> Dict:
     """
     Generate SEO 2025 optimized Schema markup with E-E-A-T and AI Search optimization.
@@ -412,6 +507,284 @@ def extract_article_content(page_content: BeautifulSoup) -> dict:
     
     return article_data
 
+def _build_service_schema(url, title, description, domain, org_name, org_id, site_url,
+                          article_data, og_image, page_content, **_) -> Dict:
+    """Service schema for service pages - VERY IMPORTANT!"""
+    
+    service_schema = {
+        "@type": "Service",
+        "@id": f"{url}#service",
+        "name": title,
+        "description": description or article_data.get('articleBody', '')[:300],
+        # Only use real images - no fake URLs
+        "image": article_data.get('images', [{'url': og_image}])[0]['url'] if article_data.get('images') else og_image,
+        "provider": {
+            "@type": "Organization",
+            "@id": org_id,
+            "name": org_name,
+            "url": site_url
+        },
+        "serviceType": title.split('|')[0].strip() if '|' in title else title[:50],
+        "areaServed": {
+            "@type": "Country",
+            "name": "Thailand"
+        },
+        "availableChannel": {
+            "@type": "ServiceChannel",
+            "serviceUrl": url
+        },
+        "hasOfferCatalog": {
+            "@type": "OfferCatalog",
+            "name": f"{title} - Service Packages",
+            "itemListElement": []
+        },
+        "audience": {
+            "@type": "BusinessAudience",
+            "audienceType": "Business owners, Startups, Enterprises"
+        },
+        "termsOfService": f"https://{domain}/terms"
+    }
+    
+    # Add service features if found
+    if article_data.get('features'):
+        service_schema["additionalProperty"] = []
+        for feature in article_data['features'][:5]:
+            service_schema["additionalProperty"].append({
+                "@type": "PropertyValue",
+                "name": "Feature",
+                "value": feature
+            })
+    
+    # Add pricing if available - extract real pricing
+    if article_data.get('hasPricing') and article_data.get('priceRange'):
+        # Try to extract real prices
+        prices = article_data.get('priceRange', [])
+        if prices:
+            service_schema["offers"] = {
+                "@type": "AggregateOffer",
+                "priceCurrency": "THB",
+                "priceRange": f"{min(prices)} - {max(prices)}" if len(prices) > 1 else prices[0]
+            }
+        # Look for package names in the content
+        if page_content:
+            package_elements = page_content.find_all(['div', 'section'], class_=lambda x: x and any(word in x.lower() for word in ['package', 'plan', 'pricing']))
+            offers = []
+            for elem in package_elements[:3]:
+                package_name = elem.find(['h3', 'h4', 'div'], class_=lambda x: x and 'title' in x.lower() if x else False)
+                package_price = elem.find(string=re.compile(r'[฿$]?[\d,]+'))
+                if package_name:
+                    offer = {
+                        "@type": "Offer",
+                        "name": package_name.get_text(strip=True),
+                        "priceCurrency": "THB"
+                    }
+                    if package_price:
+                        price_match = re.search(r'([\d,]+)', package_price)
+                        if price_match:
+                            offer["price"] = price_match.group(1).replace(',', '')
+                    offers.append(offer)
+            
+            if offers:
+                service_schema["offers"]["offers"] = offers
+    
+    # Add ratings only if found on page
+    if page_content:
+        # Look for rating stars or review counts
+        rating_elem = page_content.find(['div', 'span'], class_=lambda x: x and any(word in x.lower() for word in ['rating', 'review', 'star']) if x else False)
+        if rating_elem:
+            rating_text = rating_elem.get_text(strip=True)
+            rating_match = re.search(r'([0-9.]+)\s*(?:stars?|/5|out of 5)?', rating_text)
+            count_match = re.search(r'(\d+)\s*(?:reviews?|ratings?)', rating_text)
+            
+            if rating_match or count_match:
+                service_schema["aggregateRating"] = {
+                    "@type": "AggregateRating",
+                    "ratingValue": rating_match.group(1) if rating_match else "4.5",
+                    "reviewCount": count_match.group(1) if count_match else "10",
+                    "bestRating": "5"
+                }
+        
+        # Look for testimonials or reviews
+        testimonial_elem = page_content.find(['div', 'blockquote'], class_=lambda x: x and any(word in x.lower() for word in ['testimonial', 'review', 'feedback']) if x else False)
+        if testimonial_elem:
+            review_text = testimonial_elem.get_text(strip=True)[:200]
+            author_elem = testimonial_elem.find(['span', 'div', 'p'], class_=lambda x: x and any(word in x.lower() for word in ['author', 'name', 'client']) if x else False)
+            
+            if review_text:
+                service_schema["review"] = {
+                    "@type": "Review",
+                    "reviewRating": {
+                        "@type": "Rating",
+                        "ratingValue": "5",
+                        "bestRating": "5"
+                    },
+                    "author": {
+                        "@type": "Person",
+                        "name": author_elem.get_text(strip=True) if author_elem else "Client"
+                    },
+                    "reviewBody": review_text
+                }
+    
+    return service_schema
+
+def _build_article_schema(url, title, description, domain, content_type, author_name, keywords,
+                          article_data, og_image, org_id, website_id, site_url,
+                          now, now_iso, **_) -> Dict:
+    """Article/BlogPosting schema with E-E-A-T signals"""
+    
+    author_slug = author_name.lower().replace(' ', '-')
+    article_schema = {
+        "@type": content_type,
+        "@id": f"{url}#article",
+        "isPartOf": {"@id": website_id},
+        "author": {
+            "@type": "Person",
+            "@id": f"{site_url}/author/{author_slug}",
+            "name": author_name,
+            "url": f"{site_url}/author/{author_slug}",
+            "sameAs": [
+                f"https://www.linkedin.com/in/{author_slug}",
+                f"https://twitter.com/{author_name.lower().replace(' ', '')}"
+            ],
+            "expertise": keywords[:3] if keywords else ["Technology", "Digital Marketing"],
+            "knowsAbout": keywords[:5] if keywords else ["SEO", "Content Marketing"],
+            "alumniOf": {
+                "@type": "Organization",
+                "name": "Leading University"
+            },
+            "award": "Industry Expert",
+            "jobTitle": "Senior Content Specialist"
+        },
+        "headline": article_data.get('headline', title),
+        "description": description or article_data.get('articleBody', '')[:160],
+        "image": {
+            "@type": "ImageObject",
+            "url": og_image or f"https://{domain}/images/article-image.jpg",
+            "width": 1200,
+            "height": 630
+        },
+        "datePublished": article_data.get('datePublished', now_iso),
+        "dateModified": now_iso,
+        "publisher": {"@id": org_id},
+        "mainEntityOfPage": {
+            "@type": "WebPage",
+            "@id": url
+        },
+        "wordCount": article_data.get('wordCount', 1000),
+        "articleBody": article_data.get('articleBody', description),
+        "keywords": ", ".join(keywords) if keywords else "SEO, Digital Marketing",
+        "articleSection": "Technology",
+        "inLanguage": "th-TH",
+        "copyrightYear": now.year,
+        "copyrightHolder": {"@id": org_id},
+        "creditText": domain,
+        "creator": {"@id": org_id},
+        "discussionUrl": f"{url}#comments",
+        "commentCount": 10,
+        "accessMode": ["textual", "visual"],
+        "accessibilityFeature": ["structuralNavigation", "readingOrder", "alternativeText"],
+        "reviewedBy": {
+            "@type": "Person",
+            "name": "Editorial Team",
+            "reviewBody": "Fact-checked and reviewed for accuracy"
+        }
+    }
+    
+    # Add speakable for voice search optimization
+    article_schema["speakable"] = {
+        "@type": "SpeakableSpecification",
+        "cssSelector": ["h1", "h2", ".summary", ".key-points"]
+    }
+    
+    return article_schema
+
+def _build_product_schema(url, title, description, domain, site_name, og_image,
+                          org_id, now, **_) -> Dict:
+    """Product schema with rich snippets"""
+    
+    product_schema = {
+        "@type": "Product",
+        "@id": f"{url}#product",
+        "name": title,
+        "description": description,
+        "image": og_image or f"https://{domain}/product-image.jpg",
+        "brand": {
+            "@type": "Brand",
+            "name": site_name
+        },
+        "offers": {
+            "@type": "Offer",
+            "url": url,
+            "priceCurrency": "THB",
+            "price": "999",
+            "priceValidUntil": now.replace(year=now.year + 1).isoformat(),
+            "availability": "https://schema.org/InStock",
+            "seller": {"@id": org_id}
+        },
+        "aggregateRating": {
+            "@type": "AggregateRating",
+            "ratingValue": "4.5",
+            "reviewCount": "89"
+        },
+        "review": {
+            "@type": "Review",
+            "reviewRating": {
+                "@type": "Rating",
+                "ratingValue": "5",
+                "bestRating": "5"
+            },
+            "author": {
+                "@type": "Person",
+                "name": "Happy Customer"
+            }
+        }
+    }
+    return product_schema
+
+def _build_webpage_schema(url, title, description, domain, og_image, org_id,
+                          website_id, now_iso, **_) -> Dict:
+    """Default WebPage schema"""
+    
+    webpage_schema = {
+        "@type": "WebPage",
+        "@id": url,
+        "url": url,
+        "name": title,
+        "description": description,
+        "isPartOf": {"@id": website_id},
+        "primaryImageOfPage": {
+            "@type": "ImageObject",
+            "url": og_image or f"https://{domain}/page-image.jpg"
+        },
+        "datePublished": now_iso,
+        "dateModified": now_iso,
+        "breadcrumb": {"@id": f"{url}#breadcrumb"},
+        "inLanguage": "th-TH",
+        "potentialAction": [{
+            "@type": "ReadAction",
+            "target": [url]
+        }],
+        "author": {"@id": org_id},
+        "contributor": {"@id": org_id},
+        "publisher": {"@id": org_id}
+    }
+    
+    # Add speakable for voice search
+    webpage_schema["speakable"] = {
+        "@type": "SpeakableSpecification",
+        "cssSelector": ["h1", "h2", ".summary"]
+    }
+    
+    return webpage_schema
+
+# Main content node builder per detected content type
+_CONTENT_BUILDERS = {
+    'Service': _build_service_schema,
+    'BlogPosting': _build_article_schema,
+    'Article': _build_article_schema,
+    'Product': _build_product_schema
+}
+
 def build_comprehensive_schema(url, title, description, domain, author_name, 
                               content_type, breadcrumbs, faq_data, article_data,
                               og_image, keywords, page_content=None) -> Dict:
@@ -425,8 +798,16 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
         "@graph": []
     }
     
+    # Values shared by several graph nodes, computed once
+    site_url = f"https://{domain}"
+    org_id = f"{site_url}/#organization"
+    website_id = f"{site_url}/#website"
+    site_name = domain.replace('www.', '').split('.')[0].title()
+    now = datetime.now()
+    now_iso = now.isoformat()
+    
     # 1. Organization Schema (E-E-A-T signals) - Extract real data
-    org_name = domain.replace('www.', '').split('.')[0].title()
+    org_name = site_name
     
     # Try to find real contact information from the page
     phone_numbers = []
@@ -536,9 +917,9 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
     
     organization = {
         "@type": "Organization",
-        "@id": f"https://{domain}/#organization",
+        "@id": org_id,
         "name": org_name,
-        "url": f"https://{domain}"
+        "url": site_url
     }
     
     # Only add logo if we found a real one
@@ -571,10 +952,10 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
     # 2. WebSite Schema with SearchAction (for sitelinks search box)
     website = {
         "@type": "WebSite",
-        "@id": f"https://{domain}/#website",
-        "url": f"https://{domain}",
-        "name": domain.replace('www.', '').split('.')[0].title(),
-        "publisher": {"@id": f"https://{domain}/#organization"},
+        "@id": website_id,
+        "url": site_url,
+        "name": site_name,
+        "publisher": {"@id": org_id},
         "potentialAction": {
             "@type": "SearchAction",
             "target": f"https://{domain}/search?q={{search_term_string}}",
@@ -594,266 +975,26 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
         schema["@graph"].append(breadcrumb_schema)
     
     # 4. Main content schema based on content type
-    if content_type == 'Service':
-        # Service Schema for service pages - VERY IMPORTANT!
-        service_schema = {
-            "@type": "Service",
-            "@id": f"{url}#service",
-            "name": title,
-            "description": description or article_data.get('articleBody', '')[:300],
-            # Only use real images - no fake URLs
-            "image": article_data.get('images', [{'url': og_image}])[0]['url'] if article_data.get('images') else og_image,
-            "provider": {
-                "@type": "Organization",
-                "@id": f"https://{domain}/#organization",
-                "name": org_name if 'org_name' in locals() else domain.replace('www.', '').split('.')[0].title(),
-                "url": f"https://{domain}"
-            },
-            "serviceType": title.split('|')[0].strip() if '|' in title else title[:50],
-            "areaServed": {
-                "@type": "Country",
-                "name": "Thailand"
-            },
-            "availableChannel": {
-                "@type": "ServiceChannel",
-                "serviceUrl": url
-            },
-            "hasOfferCatalog": {
-                "@type": "OfferCatalog",
-                "name": f"{title} - Service Packages",
-                "itemListElement": []
-            },
-            "audience": {
-                "@type": "BusinessAudience",
-                "audienceType": "Business owners, Startups, Enterprises"
-            },
-            "termsOfService": f"https://{domain}/terms"
-        }
-        
-        # Add service features if found
-        if article_data.get('features'):
-            service_schema["additionalProperty"] = []
-            for feature in article_data['features'][:5]:
-                service_schema["additionalProperty"].append({
-                    "@type": "PropertyValue",
-                    "name": "Feature",
-                    "value": feature
-                })
-        
-        # Add pricing if available - extract real pricing
-        if article_data.get('hasPricing') and article_data.get('priceRange'):
-            # Try to extract real prices
-            prices = article_data.get('priceRange', [])
-            if prices:
-                service_schema["offers"] = {
-                    "@type": "AggregateOffer",
-                    "priceCurrency": "THB",
-                    "priceRange": f"{min(prices)} - {max(prices)}" if len(prices) > 1 else prices[0]
-                }
-            # Look for package names in the content
-            if page_content:
-                package_elements = page_content.find_all(['div', 'section'], class_=lambda x: x and any(word in x.lower() for word in ['package', 'plan', 'pricing']))
-                offers = []
-                for elem in package_elements[:3]:
-                    package_name = elem.find(['h3', 'h4', 'div'], class_=lambda x: x and 'title' in x.lower() if x else False)
-                    package_price = elem.find(string=re.compile(r'[฿$]?[\d,]+'))
-                    if package_name:
-                        offer = {
-                            "@type": "Offer",
-                            "name": package_name.get_text(strip=True),
-                            "priceCurrency": "THB"
-                        }
-                        if package_price:
-                            price_match = re.search(r'([\d,]+)', package_price)
-                            if price_match:
-                                offer["price"] = price_match.group(1).replace(',', '')
-                        offers.append(offer)
-                
-                if offers:
-                    service_schema["offers"]["offers"] = offers
-        
-        # Add ratings only if found on page
-        if page_content:
-            # Look for rating stars or review counts
-            rating_elem = page_content.find(['div', 'span'], class_=lambda x: x and any(word in x.lower() for word in ['rating', 'review', 'star']) if x else False)
-            if rating_elem:
-                rating_text = rating_elem.get_text(strip=True)
-                import re
-                rating_match = re.search(r'([0-9.]+)\s*(?:stars?|/5|out of 5)?', rating_text)
-                count_match = re.search(r'(\d+)\s*(?:reviews?|ratings?)', rating_text)
-                
-                if rating_match or count_match:
-                    service_schema["aggregateRating"] = {
-                        "@type": "AggregateRating",
-                        "ratingValue": rating_match.group(1) if rating_match else "4.5",
-                        "reviewCount": count_match.group(1) if count_match else "10",
-                        "bestRating": "5"
-                    }
-            
-            # Look for testimonials or reviews
-            testimonial_elem = page_content.find(['div', 'blockquote'], class_=lambda x: x and any(word in x.lower() for word in ['testimonial', 'review', 'feedback']) if x else False)
-            if testimonial_elem:
-                review_text = testimonial_elem.get_text(strip=True)[:200]
-                author_elem = testimonial_elem.find(['span', 'div', 'p'], class_=lambda x: x and any(word in x.lower() for word in ['author', 'name', 'client']) if x else False)
-                
-                if review_text:
-                    service_schema["review"] = {
-                        "@type": "Review",
-                        "reviewRating": {
-                            "@type": "Rating",
-                            "ratingValue": "5",
-                            "bestRating": "5"
-                        },
-                        "author": {
-                            "@type": "Person",
-                            "name": author_elem.get_text(strip=True) if author_elem else "Client"
-                        },
-                        "reviewBody": review_text
-                    }
-        
-        schema["@graph"].append(service_schema)
-        
-    elif content_type in ['BlogPosting', 'Article']:
-        # Article/BlogPosting Schema with E-E-A-T signals
-        article_schema = {
-            "@type": content_type,
-            "@id": f"{url}#article",
-            "isPartOf": {"@id": f"https://{domain}/#website"},
-            "author": {
-                "@type": "Person",
-                "@id": f"https://{domain}/author/{author_name.lower().replace(' ', '-')}",
-                "name": author_name,
-                "url": f"https://{domain}/author/{author_name.lower().replace(' ', '-')}",
-                "sameAs": [
-                    f"https://www.linkedin.com/in/{author_name.lower().replace(' ', '-')}",
-                    f"https://twitter.com/{author_name.lower().replace(' ', '')}"
-                ],
-                "expertise": keywords[:3] if keywords else ["Technology", "Digital Marketing"],
-                "knowsAbout": keywords[:5] if keywords else ["SEO", "Content Marketing"],
-                "alumniOf": {
-                    "@type": "Organization",
-                    "name": "Leading University"
-                },
-                "award": "Industry Expert",
-                "jobTitle": "Senior Content Specialist"
-            },
-            "headline": article_data.get('headline', title),
-            "description": description or article_data.get('articleBody', '')[:160],
-            "image": {
-                "@type": "ImageObject",
-                "url": og_image or f"https://{domain}/images/article-image.jpg",
-                "width": 1200,
-                "height": 630
-            },
-            "datePublished": article_data.get('datePublished', datetime.now().isoformat()),
-            "dateModified": datetime.now().isoformat(),
-            "publisher": {"@id": f"https://{domain}/#organization"},
-            "mainEntityOfPage": {
-                "@type": "WebPage",
-                "@id": url
-            },
-            "wordCount": article_data.get('wordCount', 1000),
-            "articleBody": article_data.get('articleBody', description),
-            "keywords": ", ".join(keywords) if keywords else "SEO, Digital Marketing",
-            "articleSection": "Technology",
-            "inLanguage": "th-TH",
-            "copyrightYear": datetime.now().year,
-            "copyrightHolder": {"@id": f"https://{domain}/#organization"},
-            "creditText": domain,
-            "creator": {"@id": f"https://{domain}/#organization"},
-            "discussionUrl": f"{url}#comments",
-            "commentCount": 10,
-            "accessMode": ["textual", "visual"],
-            "accessibilityFeature": ["structuralNavigation", "readingOrder", "alternativeText"],
-            "reviewedBy": {
-                "@type": "Person",
-                "name": "Editorial Team",
-                "reviewBody": "Fact-checked and reviewed for accuracy"
-            }
-        }
-        
-        # Add speakable for voice search optimization
-        article_schema["speakable"] = {
-            "@type": "SpeakableSpecification",
-            "cssSelector": ["h1", "h2", ".summary", ".key-points"]
-        }
-        
-        schema["@graph"].append(article_schema)
-        
-    elif content_type == 'Product':
-        # Product Schema with rich snippets
-        product_schema = {
-            "@type": "Product",
-            "@id": f"{url}#product",
-            "name": title,
-            "description": description,
-            "image": og_image or f"https://{domain}/product-image.jpg",
-            "brand": {
-                "@type": "Brand",
-                "name": domain.replace('www.', '').split('.')[0].title()
-            },
-            "offers": {
-                "@type": "Offer",
-                "url": url,
-                "priceCurrency": "THB",
-                "price": "999",
-                "priceValidUntil": (datetime.now().replace(year=datetime.now().year + 1)).isoformat(),
-                "availability": "https://schema.org/InStock",
-                "seller": {"@id": f"https://{domain}/#organization"}
-            },
-            "aggregateRating": {
-                "@type": "AggregateRating",
-                "ratingValue": "4.5",
-                "reviewCount": "89"
-            },
-            "review": {
-                "@type": "Review",
-                "reviewRating": {
-                    "@type": "Rating",
-                    "ratingValue": "5",
-                    "bestRating": "5"
-                },
-                "author": {
-                    "@type": "Person",
-                    "name": "Happy Customer"
-                }
-            }
-        }
-        schema["@graph"].append(product_schema)
-        
-    else:
-        # Default WebPage Schema
-        webpage_schema = {
-            "@type": "WebPage",
-            "@id": url,
-            "url": url,
-            "name": title,
-            "description": description,
-            "isPartOf": {"@id": f"https://{domain}/#website"},
-            "primaryImageOfPage": {
-                "@type": "ImageObject",
-                "url": og_image or f"https://{domain}/page-image.jpg"
-            },
-            "datePublished": datetime.now().isoformat(),
-            "dateModified": datetime.now().isoformat(),
-            "breadcrumb": {"@id": f"{url}#breadcrumb"},
-            "inLanguage": "th-TH",
-            "potentialAction": [{
-                "@type": "ReadAction",
-                "target": [url]
-            }],
-            "author": {"@id": f"https://{domain}/#organization"},
-            "contributor": {"@id": f"https://{domain}/#organization"},
-            "publisher": {"@id": f"https://{domain}/#organization"}
-        }
-        
-        # Add speakable for voice search
-        webpage_schema["speakable"] = {
-            "@type": "SpeakableSpecification",
-            "cssSelector": ["h1", "h2", ".summary"]
-        }
-        
-        schema["@graph"].append(webpage_schema)
+    build_main_node = _CONTENT_BUILDERS.get(content_type, _build_webpage_schema)
+    schema["@graph"].append(build_main_node(
+        url=url,
+        title=title,
+        description=description,
+        domain=domain,
+        content_type=content_type,
+        author_name=author_name,
+        keywords=keywords,
+        article_data=article_data,
+        og_image=og_image,
+        page_content=page_content,
+        org_name=org_name,
+        org_id=org_id,
+        website_id=website_id,
+        site_url=site_url,
+        site_name=site_name,
+        now=now,
+        now_iso=now_iso
+    ))
     
     # 5. Add FAQPage Schema if FAQ content exists
     if faq_data:
@@ -901,7 +1042,7 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
         schema["@graph"].append(itemlist_schema)
     
     # 8. Add CollectionPage for category/listing pages
-    if any(x in url.lower() for x in ['/category/', '/tag/', '/archive/']):
+    if _COLLECTION_PATH_RE.search(url):
         collection_schema = {
             "@type": "CollectionPage",
             "@id": f"{url}#collection",
@@ -912,7 +1053,7 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
         schema["@graph"].append(collection_schema)
     
     # 9. Add HowTo Schema if tutorial content detected
-    if any(x in title.lower() for x in ['how to', 'guide', 'tutorial', 'วิธี']):
+    if _HOWTO_TITLE_RE.search(title):
         howto_schema = {
             "@type": "HowTo",
             "name": title,
@@ -930,27 +1071,58 @@ def build_comprehensive_schema(url, title, description, domain, author_name,
     # Return the comprehensive schema
     return schema
 
+def _cached_schema_result(entry: Dict) -> Dict:
+    """Return a copy of a cached analysis with a fresh check time"""
+    result = dict(entry['result'])
+    result['checked_at'] = datetime.now().isoformat()
+    return result
+
+def _store_schema_result(url: str, result: Dict, response: requests.Response):
+    """Cache a successful analysis together with its HTTP validators"""
+    with _schema_cache_lock:
+        _schema_cache.pop(url, None)
+        if len(_schema_cache) >= SCHEMA_CACHE_MAX_SIZE:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            _schema_cache.pop(next(iter(_schema_cache)))
+        _schema_cache[url] = {
+            'result': result,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'cached_at': time.time()
+        }
+
 def extract_schema_markup(url: str) -> Dict:
     """Extract and analyze Schema.org markup from a webpage with better error handling"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-        }
-        
-        session = requests.Session()
-        response = session.get(url, headers=headers, timeout=12, allow_redirects=True)
+        with _schema_cache_lock:
+            cached = _schema_cache.get(url)
+        if cached and time.time() - cached['cached_at'] < SCHEMA_CACHE_TTL:
+            return _cached_schema_result(cached)
+        
+        # Expired entries are revalidated instead of re-parsed when the server allows it
+        headers = _BROWSER_HEADERS
+        if cached:
+            headers = dict(_BROWSER_HEADERS)
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = SESSION.get(url, headers=headers, timeout=12, allow_redirects=True)
+        if cached and response.status_code == 304:
+            cached['cached_at'] = time.time()
+            return _cached_schema_result(cached)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(response.content, 'lxml')
         schemas = []
         schema_types = set()
         
         # 1. Check for JSON-LD Schema
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
+        json_ld_scripts = _JSON_LD_SELECTOR.select(soup)
         for script in json_ld_scripts:
             try:
-                schema_data = json.loads(script.string)
+                schema_data = orjson.loads((script.string or '').lstrip('\ufeff'))
                 if isinstance(schema_data, list):
                     for item in schema_data:
                         if '@type' in item:
@@ -971,7 +1143,7 @@ def extract_schema_markup(url: str) -> Dict:
                 continue
         
         # 2. Check for Microdata
-        microdata_items = soup.find_all(attrs={'itemscope': True})
+        microdata_items = _ITEMSCOPE_SELECTOR.select(soup)
         for item in microdata_items:
             item_type = item.get('itemtype', '')
             if 'schema.org' in item_type:
@@ -980,7 +1152,7 @@ def extract_schema_markup(url: str) -> Dict:
                 
                 # Extract microdata properties
                 properties = {}
-                for prop in item.find_all(attrs={'itemprop': True}):
+                for prop in _ITEMPROP_SELECTOR.select(item):
                     prop_name = prop.get('itemprop')
                     prop_value = prop.get('content') or prop.get_text(strip=True)
                     properties[prop_name] = prop_value
@@ -992,7 +1164,7 @@ def extract_schema_markup(url: str) -> Dict:
                 })
         
         # 3. Check for RDFa
-        rdfa_items = soup.find_all(attrs={'typeof': True})
+        rdfa_items = _TYPEOF_SELECTOR.select(soup)
         for item in rdfa_items:
             schema_type = item.get('typeof', '')
             if schema_type:
@@ -1000,7 +1172,7 @@ def extract_schema_markup(url: str) -> Dict:
                 
                 # Extract RDFa properties
                 properties = {}
-                for prop in item.find_all(attrs={'property': True}):
+                for prop in _PROPERTY_SELECTOR.select(item):
                     prop_name = prop.get('property')
                     prop_value = prop.get('content') or prop.get_text(strip=True)
                     properties[prop_name] = prop_value
@@ -1017,15 +1189,7 @@ def extract_schema_markup(url: str) -> Dict:
         ai_optimized = False
         
         # Check for essential schema types for AI search
-        ai_essential_types = {
-            'Article', 'NewsArticle', 'BlogPosting', 'WebPage',
-            'Product', 'Review', 'AggregateRating',
-            'Organization', 'LocalBusiness', 'Person',
-            'FAQPage', 'HowTo', 'Recipe', 'Event',
-            'BreadcrumbList', 'VideoObject', 'ImageObject'
-        }
-        
-        found_essential = schema_types & ai_essential_types
+        found_essential = schema_types & _AI_ESSENTIAL_TYPES
         if found_essential:
             score += 30
             ai_optimized = True
@@ -1034,49 +1198,32 @@ def extract_schema_markup(url: str) -> Dict:
         
         # Check for rich properties
         for schema in schemas:
-            if schema['format'] == 'JSON-LD':
-                data = schema['data']
-                
-                # Check for essential properties
-                essential_props = {
-                    'name', 'description', 'image', 'author',
-                    'datePublished', 'dateModified', 'headline'
-                }
-                
-                existing_props = set(data.keys())
-                if existing_props & essential_props:
-                    score += 10
-                
-                # Check for structured author
-                if 'author' in data and isinstance(data['author'], dict):
-                    if '@type' in data['author'] and data['author']['@type'] == 'Person':
-                        score += 10
-                    else:
-                        recommendations.append("ระบุ author เป็น Person หรือ Organization Schema")
-                
-                # Check for images
-                if 'image' in data:
-                    if isinstance(data['image'], (list, dict)):
-                        score += 10
-                    else:
-                        recommendations.append("เพิ่มข้อมูล image แบบ structured (URL, width, height)")
-                else:
-                    recommendations.append("เพิ่ม image property สำหรับการแสดงผลใน AI Search")
-                
-                # Check for breadcrumbs
-                if schema['type'] == 'BreadcrumbList':
-                    score += 15
-                    ai_optimized = True
-                
-                # Check for FAQ
-                if schema['type'] == 'FAQPage':
-                    score += 20
-                    ai_optimized = True
-                
-                # Check for ratings/reviews
-                if schema['type'] in ['Review', 'AggregateRating']:
-                    score += 15
-                    ai_optimized = True
+            if schema['format'] != 'JSON-LD':
+                continue
+            
+            data = schema['data']
+            data_keys = data.keys()
+            
+            # Check for essential properties
+            if data_keys & _ESSENTIAL_PROPS:
+                score += 10
+            
+            # Check structured author / image
+            for prop, scorer in _PROPERTY_SCORERS.items():
+                if prop in data_keys:
+                    points, recommendation = scorer(data[prop])
+                    score += points
+                    if recommendation:
+                        recommendations.append(recommendation)
+            
+            if 'image' not in data_keys:
+                recommendations.append("เพิ่ม image property สำหรับการแสดงผลใน AI Search")
+            
+            # Check for breadcrumbs, FAQ and ratings/reviews
+            bonus = _TYPE_BONUS.get(schema['type'], 0)
+            if bonus:
+                score += bonus
+                ai_optimized = True
         
         # General recommendations
         if not schemas:
@@ -1105,7 +1252,7 @@ def extract_schema_markup(url: str) -> Dict:
             print(f"Error generating schema: {e}")
             generated_schema = None
         
-        return {
+        result = {
             'url': url,
             'has_schema': len(schemas) > 0,
             'schema_types': list(schema_types),
@@ -1117,6 +1264,8 @@ def extract_schema_markup(url: str) -> Dict:
             'generated_schema': generated_schema,  # Include generated schema
             'checked_at': datetime.now().isoformat()
         }
+        _store_schema_result(url, result, response)
+        return result
         
     except requests.exceptions.RequestException as e:
         return {
@@ -1133,59 +1282,48 @@ def extract_schema_markup(url: str) -> Dict:
         }
 
 def extract_urls_from_sitemap(sitemap_url: str, limit: Optional[int] = None) -> List[str]:
-    """Extract URLs from a sitemap.xml file with improved error handling"""
-    try:
-        # Handle both full URLs and paths
-        if not sitemap_url.startswith('http'):
-            return []
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/xml,text/xml,*/*;q=0.8'
-        }
-        
-        session = requests.Session()
-        response = session.get(sitemap_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
+    """Extract unique URLs from a sitemap or sitemap index with improved error handling"""
+    # Walk sitemap indexes with a work queue instead of recursing, and keep
+    # URLs in a dict used as an ordered set so duplicates are checked once
+    pending = deque([sitemap_url])
+    queued_sitemaps = {sitemap_url}
+    urls: Dict[str, None] = {}
+    
+    while pending:
+        current_sitemap_url = pending.popleft()
         
-        # Handle different sitemap formats
-        namespaces = {
-            'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9',
-            'image': 'http://www.google.com/schemas/sitemap-image/1.1'
-        }
+        # Handle both full URLs and paths
+        if not current_sitemap_url.startswith('http'):
+            continue
         
-        urls = []
+        try:
+            response = SESSION.get(current_sitemap_url, headers=_SITEMAP_HEADERS, timeout=15)
+            response.raise_for_status()
+            
+            # Parse XML
+            root = ET.fromstring(response.content)
+        except Exception as e:
+            print(f"Error extracting sitemap: {e}")
+            continue
         
         # Check if it's a sitemap index
-        sitemap_tags = root.findall('.//ns:sitemap/ns:loc', namespaces)
+        sitemap_tags = root.findall('.//ns:sitemap/ns:loc', _SITEMAP_NAMESPACES)
         if sitemap_tags:
-            # It's a sitemap index, recursively get URLs from each sitemap
             for sitemap_tag in sitemap_tags:
-                child_sitemap_url = sitemap_tag.text.strip()
-                try:
-                    child_urls = extract_urls_from_sitemap(child_sitemap_url, limit)
-                    urls.extend(child_urls)
-                    if limit and len(urls) >= limit:
-                        return urls[:limit]
-                except:
-                    continue
+                child_sitemap_url = (sitemap_tag.text or '').strip()
+                if child_sitemap_url and child_sitemap_url not in queued_sitemaps:
+                    queued_sitemaps.add(child_sitemap_url)
+                    pending.append(child_sitemap_url)
         else:
             # Regular sitemap with URLs
-            url_tags = root.findall('.//ns:url/ns:loc', namespaces)
-            for url_tag in url_tags:
-                url = url_tag.text.strip()
-                urls.append(url)
+            for url_tag in root.findall('.//ns:url/ns:loc', _SITEMAP_NAMESPACES):
+                url = (url_tag.text or '').strip()
+                if url:
+                    urls[url] = None
                 if limit and len(urls) >= limit:
-                    return urls[:limit]
-        
-        return urls
-        
-    except Exception as e:
-        print(f"Error extracting sitemap: {e}")
-        return []
+                    return list(urls)
+    
+    return list(urls)
 
 @router.post("/api/check-schema-markup")
 async def check_schema_markup(request: SchemaCheckRequest):
@@ -1217,6 +1355,18 @@ async def check_schema_markup(request: SchemaCheckRequest):
     results = []
     loop = asyncio.get_event_loop()
     
+    # Per-host politeness instead of a blanket pause between batches
+    next_allowed = defaultdict(float)
+    
+    async def check_with_host_delay(executor, url):
+        host = urlparse(url).netloc
+        now = loop.time()
+        start = max(now, next_allowed[host])
+        next_allowed[host] = start + PER_HOST_DELAY
+        if start > now:
+            await asyncio.sleep(start - now)
+        return await loop.run_in_executor(executor, extract_schema_markup, url)
+    
     # Process in batches to avoid overwhelming
     batch_size = 10
     for i in range(0, len(urls_to_check), batch_size):
@@ -1224,7 +1374,7 @@ async def check_schema_markup(request: SchemaCheckRequest):
         
         with ThreadPoolExecutor(max_workers=min(request.max_workers, 3)) as executor:
             futures = [
-                loop.run_in_executor(executor, extract_schema_markup, url)
+                check_with_host_delay(executor, url)
                 for url in batch
             ]
             batch_results = await asyncio.gather(*futures, return_exceptions=True)
@@ -1247,10 +1397,6 @@ async def check_schema_markup(request: SchemaCheckRequest):
                     })
                 else:
                     results.append(result)
-        
-        # Small delay between batches
-        if i + batch_size < len(urls_to_check):
-            await asyncio.sleep(0.5)
     
     # Calculate summary
     summary = {
@@ -1268,17 +1414,11 @@ async def check_schema_markup(request: SchemaCheckRequest):
         summary['sitemap_url'] = request.urls
         summary['urls_checked'] = len(urls_to_check)
     
-    # Count common schema types
+    # Count common schema types, top 10 by frequency
+    type_counts = Counter()
     for result in results:
-        for schema_type in result['schema_types']:
-            summary['common_types'][schema_type] = summary['common_types'].get(schema_type, 0) + 1
-    
-    # Sort common types by frequency
-    summary['common_types'] = dict(sorted(
-        summary['common_types'].items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:10])  # Top 10 types
+        type_counts.update(result['schema_types'])
+    summary['common_types'] = dict(type_counts.most_common(10))
     
     return {
         'results': results,
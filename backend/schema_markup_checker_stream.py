@@ -1,209 +1,345 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, FastAPI, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Generator, Any
+from typing import List, Dict, Optional, AsyncIterator, Generator, Iterator, Any
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
+import codecs
 import json
+import re
+import orjson
 import xml.etree.ElementTree as ET
+from collections import Counter, deque
+from contextlib import asynccontextmanager
 from urllib.parse import urlparse
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import asyncio
+import threading
+import time
+import aiohttp
 
 router = APIRouter()
 
+# Shared HTTP session so keep-alive connections and TLS sessions are reused
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# Sitemap protocol element names as produced by ElementTree
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+SITEMAP_URL_TAG = f'{SITEMAP_NS}url'
+SITEMAP_CHILD_TAG = f'{SITEMAP_NS}sitemap'
+SITEMAP_LOC_TAG = f'{SITEMAP_NS}loc'
+
+# Request headers shared by every page and sitemap fetch
+_BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+_SITEMAP_HEADERS = {
+    'User-Agent': _BROWSER_HEADERS['User-Agent'],
+    'Accept': 'application/xml,text/xml,*/*;q=0.8'
+}
+
+# Total time budget for fetching a single page, and for parsing it afterwards
+PAGE_TIMEOUT = aiohttp.ClientTimeout(total=12)
+PARSE_TIMEOUT = 15
+
+# Only the first 512 KB of a page is downloaded and inspected
+MAX_PAGE_BYTES = 512 * 1024
+READ_CHUNK_SIZE = 16 * 1024
+
+# One connection pool and DNS cache shared by every stream for the app's lifetime
+HTTP_CONNECTION_LIMIT = 128
+HTTP_CONNECTION_LIMIT_PER_HOST = 16
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Open the shared aiohttp session on startup and close it on shutdown"""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_CONNECTION_LIMIT,
+        limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True
+    )
+    app.state.http = aiohttp.ClientSession(connector=connector)
+    try:
+        yield
+    finally:
+        await app.state.http.close()
+
 class SchemaCheckStreamRequest(BaseModel):
     sitemap_url: str
     max_workers: int = 5
     limit: Optional[int] = 50  # Default limit for streaming
 
-def extract_urls_from_sitemap(sitemap_url: str, limit: Optional[int] = None) -> List[str]:
-    """Extract URLs from a sitemap.xml file with improved error handling"""
+def _parse_sitemap(sitemap_url: str, child_sitemaps: List[str]) -> Iterator[str]:
+    """Stream-parse one sitemap, yielding page URLs and collecting child sitemap URLs"""
+    if not sitemap_url.startswith('http'):
+        return
+    
     try:
-        if not sitemap_url.startswith('http'):
-            return []
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/xml,text/xml,*/*;q=0.8'
-        }
-        
-        session = requests.Session()
-        response = session.get(sitemap_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        
-        namespaces = {
-            'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9',
-        }
-        
-        urls = []
-        
-        # Check if it's a sitemap index
-        sitemap_tags = root.findall('.//ns:sitemap/ns:loc', namespaces)
-        if sitemap_tags:
-            # It's a sitemap index
-            for sitemap_tag in sitemap_tags:
-                child_sitemap_url = sitemap_tag.text.strip()
-                try:
-                    child_urls = extract_urls_from_sitemap(child_sitemap_url, limit)
-                    urls.extend(child_urls)
-                    if limit and len(urls) >= limit:
-                        return urls[:limit]
-                except:
+        response = SESSION.get(sitemap_url, headers=_SITEMAP_HEADERS, timeout=15, stream=True)
+        try:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            
+            # Feed the socket straight into the XML parser and drop each
+            # <url>/<sitemap> element as soon as its <loc> has been read
+            root = None
+            for event, elem in ET.iterparse(response.raw, events=('start', 'end')):
+                if root is None:
+                    root = elem
+                if event != 'end':
                     continue
-        else:
-            # Regular sitemap with URLs
-            url_tags = root.findall('.//ns:url/ns:loc', namespaces)
-            for url_tag in url_tags:
-                url = url_tag.text.strip()
-                urls.append(url)
-                if limit and len(urls) >= limit:
-                    return urls[:limit]
-        
-        return urls
-        
+                if elem.tag == SITEMAP_URL_TAG:
+                    loc = elem.findtext(SITEMAP_LOC_TAG)
+                    if loc:
+                        yield loc.strip()
+                    root.clear()
+                elif elem.tag == SITEMAP_CHILD_TAG:
+                    loc = elem.findtext(SITEMAP_LOC_TAG)
+                    if loc:
+                        child_sitemaps.append(loc.strip())
+                    root.clear()
+        finally:
+            response.close()
     except Exception as e:
         print(f"Error extracting sitemap: {e}")
-        return []
 
-def extract_schema_markup(url: str) -> Dict:
-    """Extract and analyze Schema.org markup from a webpage"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-        }
-        
-        session = requests.Session()
-        response = session.get(url, headers=headers, timeout=12, allow_redirects=True)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        schemas = []
-        schema_types = set()
+def extract_urls_from_sitemap(sitemap_url: str, limit: Optional[int] = None) -> Iterator[str]:
+    """Lazily extract unique URLs from a sitemap or sitemap index, stopping once limit is reached"""
+    pending = deque([sitemap_url])
+    queued_sitemaps = {sitemap_url}
+    seen: Dict[str, None] = {}  # Ordered set of URLs already yielded
+    
+    # Walk the index breadth-first with a work queue instead of recursing
+    while pending:
+        child_sitemaps = []
+        for url in _parse_sitemap(pending.popleft(), child_sitemaps):
+            if url in seen:
+                continue
+            seen[url] = None
+            yield url
+            if limit and len(seen) >= limit:
+                return
         
-        # 1. Check for JSON-LD Schema
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_ld_scripts:
+        for child_sitemap_url in child_sitemaps:
+            if child_sitemap_url not in queued_sitemaps:
+                queued_sitemaps.add(child_sitemap_url)
+                pending.append(child_sitemap_url)
+
+# Results are trimmed to keep each streamed event small
+MAX_REPORTED_SCHEMAS = 3
+MAX_REPORTED_RECOMMENDATIONS = 3
+
+# JSON-LD bodies are cut straight out of the raw bytes without building a DOM
+_JSON_LD_RE = re.compile(
+    rb'<script[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+# Pages without an HTTP charset declare it in a <meta> tag near the top
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_SCAN_BYTES = 4096
+
+# XPath queries compiled once and evaluated directly against the lxml tree
+_ITEMSCOPE_XPATH = etree.XPath('//*[@itemscope]')
+_ITEMPROP_XPATH = etree.XPath('.//*[@itemprop]')
+
+# lxml parsers are not thread-safe, so each parsing thread keeps its own
+_parser_local = threading.local()
+
+def _html_parser(encoding: str) -> etree.HTMLParser:
+    """Return this thread's reusable lxml HTML parser for an encoding"""
+    parsers = getattr(_parser_local, 'parsers', None)
+    if parsers is None:
+        parsers = _parser_local.parsers = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = etree.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+    return parser
+
+def _page_encoding(body: bytes, charset: Optional[str]) -> str:
+    """Pick a page's encoding from the HTTP charset, then <meta charset>, then the bytes"""
+    meta = _META_CHARSET_RE.search(body, 0, META_CHARSET_SCAN_BYTES)
+    for candidate in (charset, meta.group(1).decode('ascii') if meta else None):
+        if candidate:
             try:
-                schema_data = json.loads(script.string)
-                if isinstance(schema_data, list):
-                    for item in schema_data:
-                        if '@type' in item:
-                            schema_types.add(item['@type'])
-                            schemas.append({
-                                'format': 'JSON-LD',
-                                'type': item['@type'],
-                                'data': item
-                            })
-                elif '@type' in schema_data:
-                    schema_types.add(schema_data['@type'])
-                    schemas.append({
-                        'format': 'JSON-LD',
-                        'type': schema_data['@type'],
-                        'data': schema_data
-                    })
-            except json.JSONDecodeError:
-                continue
+                return codecs.lookup(candidate).name
+            except LookupError:
+                pass
+    
+    # Undeclared: UTF-8 if the bytes are valid (the body may end mid-character
+    # after the byte cap), otherwise the latin-1 default HTTP clients use
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(body, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+# Schema types that matter most for AI search
+_AI_ESSENTIAL_TYPES = frozenset({
+    'Article', 'NewsArticle', 'BlogPosting', 'WebPage',
+    'Product', 'Review', 'AggregateRating',
+    'Organization', 'LocalBusiness', 'Person',
+    'FAQPage', 'HowTo', 'Recipe', 'Event',
+    'BreadcrumbList', 'VideoObject', 'ImageObject'
+})
+
+# Points per JSON-LD property group (name and headline count once together)
+_PROP_POINTS = {
+    frozenset({'name', 'headline'}): 10,
+    frozenset({'description'}): 10,
+    frozenset({'image'}): 10,
+    frozenset({'author'}): 10
+}
+
+# Bonus points for schema types that also mark the page as AI optimized
+_TYPE_BONUS = {
+    'BreadcrumbList': 15,
+    'FAQPage': 20,
+    'Review': 15,
+    'AggregateRating': 15
+}
+
+def analyze_schema_markup(url: str, body: bytes, charset: Optional[str] = None) -> Dict:
+    """Analyze Schema.org markup in an already downloaded page"""
+    encoding = _page_encoding(body, charset)
+    
+    # Only pages with microdata are parsed into a tree at all
+    tree = None
+    if b'itemscope' in body:
+        tree = etree.fromstring(body, parser=_html_parser(encoding))
+    schemas = []  # Only the first few are kept for the response
+    schema_count = 0
+    schema_types = set()
+    score = 0
+    ai_optimized = False
+    
+    # 1. Check for JSON-LD Schema, scoring each schema as it is found
+    json_ld_scripts = _JSON_LD_RE.findall(body) if b'application/ld+json' in body else []
+    for script in json_ld_scripts:
+        try:
+            script = script.strip().removeprefix(_UTF8_BOM)
+            # orjson reads UTF-8 bytes directly; other encodings are decoded first
+            schema_data = orjson.loads(script if encoding == 'utf-8' else script.decode(encoding, 'replace'))
+        except json.JSONDecodeError:
+            continue
         
-        # 2. Check for Microdata
-        microdata_items = soup.find_all(attrs={'itemscope': True})
-        for item in microdata_items:
-            item_type = item.get('itemtype', '')
-            if 'schema.org' in item_type:
-                schema_type = item_type.split('/')[-1]
-                schema_types.add(schema_type)
-                
-                properties = {}
-                for prop in item.find_all(attrs={'itemprop': True}):
-                    prop_name = prop.get('itemprop')
-                    prop_value = prop.get('content') or prop.get_text(strip=True)
-                    properties[prop_name] = prop_value
-                
+        for item in schema_data if isinstance(schema_data, list) else (schema_data,):
+            if '@type' not in item:
+                continue
+            schema_type = item['@type']
+            schema_types.add(schema_type)
+            schema_count += 1
+            if len(schemas) < MAX_REPORTED_SCHEMAS:
                 schemas.append({
-                    'format': 'Microdata',
+                    'format': 'JSON-LD',
                     'type': schema_type,
-                    'data': properties
+                    'data': item
                 })
+            
+            # Check for rich properties
+            data_keys = item.keys()
+            score += sum(points for props, points in _PROP_POINTS.items() if data_keys & props)
+            
+            # Special schema bonuses
+            bonus = _TYPE_BONUS.get(schema_type, 0)
+            if bonus:
+                score += bonus
+                ai_optimized = True
+    
+    # 2. Check for Microdata
+    microdata_items = _ITEMSCOPE_XPATH(tree) if tree is not None else []
+    for item in microdata_items:
+        item_type = item.get('itemtype', '')
+        if 'schema.org' in item_type:
+            schema_type = item_type.split('/')[-1]
+            schema_types.add(schema_type)
+            schema_count += 1
+            if len(schemas) >= MAX_REPORTED_SCHEMAS:
+                continue
+            
+            properties = {}
+            for prop in _ITEMPROP_XPATH(item):
+                prop_name = prop.get('itemprop')
+                prop_value = prop.get('content') or ''.join(text.strip() for text in prop.itertext())
+                properties[prop_name] = prop_value
+            
+            schemas.append({
+                'format': 'Microdata',
+                'type': schema_type,
+                'data': properties
+            })
+    
+    # Analyze for AI Search Optimization
+    recommendations = []
+    
+    # Check for essential schema types
+    found_essential = schema_types & _AI_ESSENTIAL_TYPES
+    if found_essential:
+        score += 30
+        ai_optimized = True
+    else:
+        recommendations.append("เพิ่ม Schema ประเภทหลักเช่น Article, Product, Organization")
+    
+    # General recommendations
+    if not schema_count:
+        recommendations.append("ไม่พบ Schema Markup - ควรเพิ่ม JSON-LD Schema")
+        recommendations.append("เริ่มต้นด้วย WebPage หรือ Article Schema")
+    
+    if schema_count < 2:
+        recommendations.append("เพิ่ม Schema หลายประเภทเพื่อข้อมูลที่สมบูรณ์")
+    
+    if 'BreadcrumbList' not in schema_types:
+        recommendations.append("เพิ่ม BreadcrumbList สำหรับ navigation")
+    
+    # Calculate final score (max 100)
+    score = min(score, 100)
+    
+    return {
+        'url': url,
+        'has_schema': schema_count > 0,
+        'schema_types': list(schema_types),
+        'schema_count': schema_count,
+        'schemas': schemas,
+        'ai_search_optimized': ai_optimized,
+        'recommendations': recommendations[:MAX_REPORTED_RECOMMENDATIONS],  # Top recommendations
+        'score': score,
+        'checked_at': datetime.now().isoformat()
+    }
+
+async def fetch_schema_markup(session: aiohttp.ClientSession, url: str) -> Dict:
+    """Fetch a webpage and extract its Schema.org markup, parsing off the event loop"""
+    try:
+        async with session.get(url, headers=_BROWSER_HEADERS, timeout=PAGE_TIMEOUT, allow_redirects=True) as response:
+            response.raise_for_status()
+            
+            # Schema markup lives in the first part of the page, so stop
+            # reading large documents once the byte cap is reached
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= MAX_PAGE_BYTES:
+                    response.close()
+                    break
+            body = b''.join(chunks)
+    
+        # The parse thread cannot be interrupted, but the stream stops waiting on it
+        return await asyncio.wait_for(asyncio.to_thread(analyze_schema_markup, url, body, response.charset), PARSE_TIMEOUT)
         
-        # Analyze for AI Search Optimization
-        recommendations = []
-        score = 0
-        ai_optimized = False
-        
-        # Check for essential schema types
-        ai_essential_types = {
-            'Article', 'NewsArticle', 'BlogPosting', 'WebPage',
-            'Product', 'Review', 'AggregateRating',
-            'Organization', 'LocalBusiness', 'Person',
-            'FAQPage', 'HowTo', 'Recipe', 'Event',
-            'BreadcrumbList', 'VideoObject', 'ImageObject'
-        }
-        
-        found_essential = schema_types & ai_essential_types
-        if found_essential:
-            score += 30
-            ai_optimized = True
-        else:
-            recommendations.append("เพิ่ม Schema ประเภทหลักเช่น Article, Product, Organization")
-        
-        # Check for rich properties in schemas
-        for schema in schemas:
-            if schema['format'] == 'JSON-LD':
-                data = schema['data']
-                
-                # Check for essential properties
-                if 'name' in data or 'headline' in data:
-                    score += 10
-                if 'description' in data:
-                    score += 10
-                if 'image' in data:
-                    score += 10
-                if 'author' in data:
-                    score += 10
-                
-                # Special schema bonuses
-                if schema['type'] == 'BreadcrumbList':
-                    score += 15
-                    ai_optimized = True
-                elif schema['type'] == 'FAQPage':
-                    score += 20
-                    ai_optimized = True
-                elif schema['type'] in ['Review', 'AggregateRating']:
-                    score += 15
-                    ai_optimized = True
-        
-        # General recommendations
-        if not schemas:
-            recommendations.append("ไม่พบ Schema Markup - ควรเพิ่ม JSON-LD Schema")
-            recommendations.append("เริ่มต้นด้วย WebPage หรือ Article Schema")
-        
-        if len(schemas) < 2:
-            recommendations.append("เพิ่ม Schema หลายประเภทเพื่อข้อมูลที่สมบูรณ์")
-        
-        if 'BreadcrumbList' not in schema_types:
-            recommendations.append("เพิ่ม BreadcrumbList สำหรับ navigation")
-        
-        # Calculate final score (max 100)
-        score = min(score, 100)
-        
-        return {
-            'url': url,
-            'has_schema': len(schemas) > 0,
-            'schema_types': list(schema_types),
-            'schema_count': len(schemas),
-            'schemas': schemas[:3],  # Limit schemas in response to reduce size
-            'ai_search_optimized': ai_optimized,
-            'recommendations': recommendations[:3],  # Top 3 recommendations
-            'score': score,
-            'checked_at': datetime.now().isoformat()
-        }
-        
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         return {
             'url': url,
             'has_schema': False,
@@ -215,7 +351,7 @@ def extract_schema_markup(url: str) -> Dict:
             'score': 0,
             'error': 'Timeout'
         }
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         return {
             'url': url,
             'has_schema': False,
@@ -240,54 +376,119 @@ def extract_schema_markup(url: str) -> Dict:
             'error': str(e)[:100]
         }
 
-async def stream_schema_check(request: SchemaCheckStreamRequest) -> Generator:
+SSE_KEEP_ALIVE = b": keep-alive\n\n"
+
+# Pages checked concurrently per stream
+MAX_STREAM_WORKERS = 3
+
+# Buffered SSE frames are flushed after this many events or seconds
+SSE_FLUSH_EVENTS = 8
+SSE_FLUSH_INTERVAL = 0.2
+
+def sse(event: Dict) -> bytes:
+    """Encode one Server-Sent Events data frame"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+async def stream_schema_check(request: SchemaCheckStreamRequest, session: aiohttp.ClientSession) -> Generator:
     """Stream schema checking progress with improved stability"""
     
     # Send initial status
-    yield f"data: {json.dumps({'type': 'status', 'message': 'กำลังดึงข้อมูลจาก Sitemap...', 'progress': 0})}\\n\\n"
-    yield f": keep-alive\\n\\n"
+    yield sse({'type': 'status', 'message': 'กำลังดึงข้อมูลจาก Sitemap...', 'progress': 0})
+    yield SSE_KEEP_ALIVE
     
-    # Step 1: Fetch URLs from sitemap
-    urls = extract_urls_from_sitemap(request.sitemap_url, request.limit)
+    # Limit max_workers for stability, whoever calls us; the consumer count
+    # is the only limit on concurrent page checks
+    max_workers = max(1, min(request.max_workers, MAX_STREAM_WORKERS))
     
-    if not urls:
-        yield f"data: {json.dumps({'type': 'error', 'message': 'ไม่พบ URLs ใน sitemap หรือไม่สามารถเข้าถึง sitemap'})}\\n\\n"
-        return
+    # Step 1 and 2 run as a pipeline: a producer streams URLs out of the sitemap
+    # while consumers check the ones already found, so results start right away
+    url_queue = asyncio.Queue(maxsize=max_workers * 2)
+    result_queue = asyncio.Queue()
     
-    yield f"data: {json.dumps({'type': 'status', 'message': f'พบ {len(urls)} URLs กำลังตรวจสอบ Schema...', 'progress': 10, 'total_urls': len(urls)})}\\n\\n"
+    async def produce_urls():
+        """Feed sitemap URLs to the consumers, then one stop marker per consumer"""
+        urls = extract_urls_from_sitemap(request.sitemap_url, request.limit)
+        url_count = 0
+        while True:
+            url = await asyncio.to_thread(next, urls, None)
+            if url is None:
+                break
+            url_count += 1
+            await url_queue.put(url)
+        result_queue.put_nowait(('sitemap_done', url_count))
+        for _ in range(max_workers):
+            await url_queue.put(None)
+    
+    async def consume_urls():
+        """Check queued URLs until the stop marker arrives"""
+        while True:
+            url = await url_queue.get()
+            if url is None:
+                break
+            result_queue.put_nowait(('result', await fetch_schema_markup(session, url)))
+        result_queue.put_nowait(('worker_done', None))
     
-    # Step 2: Check schema for each URL
     results = []
     with_schema = 0
     without_schema = 0
     ai_optimized = 0
     total_score = 0
-    schema_types_count = {}
+    schema_types_count = Counter()
     
-    # Process URLs in batches
+    # Batches are only used for progress reporting
     batch_size = 5
-    for batch_start in range(0, len(urls), batch_size):
-        batch_end = min(batch_start + batch_size, len(urls))
-        batch = urls[batch_start:batch_end]
-        
-        yield f"data: {json.dumps({'type': 'log', 'message': f'ตรวจสอบ URLs {batch_start + 1}-{batch_end} จาก {len(urls)}', 'current': batch_end, 'total': len(urls)})}\\n\\n"
-        
-        # Check schemas in batch
-        with ThreadPoolExecutor(max_workers=min(request.max_workers, 3)) as executor:
-            futures = [executor.submit(extract_schema_markup, url) for url in batch]
+    total_urls = None  # Unknown until the whole sitemap has been read
+    workers_left = max_workers
+    completed = 0
+    reported = 0  # Completed count at the last progress report
+    
+    # Per-URL frames are coalesced and sent together to cut down on ASGI sends
+    pending_frames = []
+    last_flush = time.monotonic()
+    
+    tasks = [asyncio.create_task(produce_urls())]
+    tasks += [asyncio.create_task(consume_urls()) for _ in range(max_workers)]
+    try:
+        while workers_left:
+            if pending_frames:
+                # Buffered frames go out when the interval expires even if no
+                # further event arrives, e.g. while one slow page is still loading
+                remaining = last_flush + SSE_FLUSH_INTERVAL - time.monotonic()
+                try:
+                    kind, payload = await asyncio.wait_for(result_queue.get(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    yield b''.join(pending_frames)
+                    pending_frames.clear()
+                    last_flush = time.monotonic()
+                    continue
+            else:
+                kind, payload = await result_queue.get()
+            
+            if kind == 'worker_done':
+                workers_left -= 1
+                continue
             
-            for future in as_completed(futures):
+            if kind == 'sitemap_done':
+                total_urls = payload
+                if not total_urls:
+                    yield sse({'type': 'error', 'message': 'ไม่พบ URLs ใน sitemap หรือไม่สามารถเข้าถึง sitemap'})
+                    return
+                # Checks may already be under way, so report progress made so far
+                progress = 10 + (80 * completed / total_urls)
+                pending_frames.append(sse({'type': 'status', 'message': f'พบ {total_urls} URLs กำลังตรวจสอบ Schema...', 'progress': round(progress), 'total_urls': total_urls}))
+            else:
+                completed += 1
                 try:
-                    result = future.result(timeout=15)
+                    result = payload
                     results.append(result)
                     
                     # Update statistics
                     if result['has_schema']:
                         with_schema += 1
-                        yield f"data: {json.dumps({'type': 'found', 'url': result['url'], 'schema_count': result['schema_count'], 'types': result['schema_types'][:3]})}\\n\\n"
+                        pending_frames.append(sse({'type': 'found', 'url': result['url'], 'schema_count': result['schema_count'], 'types': result['schema_types'][:3]}))
                     else:
                         without_schema += 1
-                        yield f"data: {json.dumps({'type': 'not_found', 'url': result['url']})}\\n\\n"
+                        pending_frames.append(sse({'type': 'not_found', 'url': result['url']}))
                     
                     if result.get('ai_search_optimized'):
                         ai_optimized += 1
@@ -295,30 +496,43 @@ async def stream_schema_check(request: SchemaCheckStreamRequest) -> Generator:
                     total_score += result['score']
                     
                     # Count schema types
-                    for schema_type in result['schema_types']:
-                        schema_types_count[schema_type] = schema_types_count.get(schema_type, 0) + 1
+                    schema_types_count.update(result['schema_types'])
                     
                 except Exception as e:
                     print(f"Error processing result: {e}")
-                    continue
-        
-        # Update progress
-        progress = 10 + (80 * batch_end / len(urls))
-        yield f"data: {json.dumps({'type': 'progress', 'progress': round(progress)})}\\n\\n"
+            
+            if completed != reported and (completed % batch_size == 0 or completed == total_urls):
+                reported = completed
+                
+                # Until the sitemap is fully read, the limit stands in for the total
+                expected = total_urls or max(request.limit or 0, completed + 1)
+                
+                # Update progress
+                progress = 10 + (80 * completed / expected)
+                pending_frames.append(sse({'type': 'log', 'message': f'ตรวจสอบ URLs {completed - (completed - 1) % batch_size}-{completed} จาก {expected}', 'current': completed, 'total': expected}))
+                pending_frames.append(sse({'type': 'progress', 'progress': round(progress)}))
+                
+                # Keep-alive between batches, flushed with whatever is still buffered
+                pending_frames.append(SSE_KEEP_ALIVE)
+            elif kind == 'result' and len(pending_frames) < SSE_FLUSH_EVENTS and time.monotonic() - last_flush <= SSE_FLUSH_INTERVAL:
+                continue
+            
+            yield b''.join(pending_frames)
+            pending_frames.clear()
+            last_flush = time.monotonic()
         
-        # Keep-alive between batches
-        yield f": keep-alive\\n\\n"
-        await asyncio.sleep(0.2)
+        if pending_frames:
+            yield b''.join(pending_frames)
+    finally:
+        # Stop the producer and consumers if the client disconnects mid-stream
+        for task in tasks:
+            task.cancel()
     
     # Step 3: Prepare summary
-    yield f"data: {json.dumps({'type': 'status', 'message': 'กำลังสรุปผลการตรวจสอบ...', 'progress': 90})}\\n\\n"
+    yield sse({'type': 'status', 'message': 'กำลังสรุปผลการตรวจสอบ...', 'progress': 90})
     
     # Sort schema types by frequency
-    common_types = dict(sorted(
-        schema_types_count.items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:10])
+    common_types = dict(schema_types_count.most_common(10))
     
     summary = {
         'total_urls': len(results),
@@ -337,19 +551,17 @@ async def stream_schema_check(request: SchemaCheckStreamRequest) -> Generator:
         'progress': 100
     }
     
-    yield f"data: {json.dumps(final_data)}\\n\\n"
+    yield sse(final_data)
 
 @router.get("/api/check-schema-markup-stream")
 async def check_schema_markup_stream(
+    http_request: Request,
     sitemap_url: str,
     limit: int = 50,
     max_workers: int = 5
 ):
     """Stream schema markup checking progress with improved stability"""
     
-    # Limit max_workers for stability
-    max_workers = min(max_workers, 3)
-    
     request = SchemaCheckStreamRequest(
         sitemap_url=sitemap_url,
         limit=limit,
@@ -357,7 +569,7 @@ async def check_schema_markup_stream(
     )
     
     return StreamingResponse(
-        stream_schema_check(request),
+        stream_schema_check(request, http_request.app.state.http),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-store, must-revalidate",
@@ -12,6 +12,7 @@ response = requests.post(
     timeout=30
 )
 
+out = []
 if response.status_code == 200:
     data = response.json()
     result = data['results'][0]
@@ -19,63 +20,65 @@ if response.status_code == 200:
     if result.get('generated_schema'):
         schema = result['generated_schema']
         
-        print("=" * 70)
-        print("🔍 REAL DATA EXTRACTED FROM VISIONXBRAIN.COM")
-        print("=" * 70)
+        out.append("=" * 70)
+        out.append("🔍 REAL DATA EXTRACTED FROM VISIONXBRAIN.COM")
+        out.append("=" * 70)
         
         # Check Organization data
         for node in schema.get('@graph', []):
             if node.get('@type') == 'Organization':
-                print("\n📢 ORGANIZATION DATA:")
-                print(f"  • Name: {node.get('name')}")
-                print(f"  • Logo: {node.get('logo', {}).get('url', 'Not found')}")
-                print(f"  • Social Links: {len(node.get('sameAs', []))} found")
+                out.append("\n📢 ORGANIZATION DATA:")
+                out.append(f"  • Name: {node.get('name')}")
+                out.append(f"  • Logo: {node.get('logo', {}).get('url', 'Not found')}")
+                out.append(f"  • Social Links: {len(node.get('sameAs', []))} found")
                 for link in node.get('sameAs', [])[:5]:
-                    print(f"    - {link}")
+                    out.append(f"    - {link}")
                 if 'contactPoint' in node:
-                    print(f"  • Phone: {node['contactPoint'].get('telephone', 'Not found')}")
-                    print(f"  • Email: {node['contactPoint'].get('email', 'Not found')}")
+                    out.append(f"  • Phone: {node['contactPoint'].get('telephone', 'Not found')}")
+                    out.append(f"  • Email: {node['contactPoint'].get('email', 'Not found')}")
                     
             elif node.get('@type') == 'Service':
-                print("\n🛠️ SERVICE DATA:")
-                print(f"  • Name: {node.get('name')[:60]}...")
-                print(f"  • Image: {node.get('image', 'Not found')}")
+                out.append("\n🛠️ SERVICE DATA:")
+                out.append(f"  • Name: {node.get('name')[:60]}...")
+                out.append(f"  • Image: {node.get('image', 'Not found')}")
                 if 'offers' in node:
-                    print(f"  • Pricing: {node['offers'].get('priceRange', 'Not specified')}")
+                    out.append(f"  • Pricing: {node['offers'].get('priceRange', 'Not specified')}")
                 if 'aggregateRating' in node:
-                    print(f"  • Rating: {node['aggregateRating'].get('ratingValue')}/5 ({node['aggregateRating'].get('reviewCount')} reviews)")
+                    out.append(f"  • Rating: {node['aggregateRating'].get('ratingValue')}/5 ({node['aggregateRating'].get('reviewCount')} reviews)")
                 if 'review' in node:
-                    print(f"  • Review snippet: {node['review'].get('reviewBody', '')[:100]}...")
+                    out.append(f"  • Review snippet: {node['review'].get('reviewBody', '')[:100]}...")
                     
             elif node.get('@type') == 'FAQPage':
-                print("\n❓ FAQ DATA:")
+                out.append("\n❓ FAQ DATA:")
                 faqs = node.get('mainEntity', [])
-                print(f"  • Total FAQs extracted: {len(faqs)}")
+                out.append(f"  • Total FAQs extracted: {len(faqs)}")
                 for i, faq in enumerate(faqs[:3], 1):
-                    print(f"\n  FAQ {i}:")
-                    print(f"    Q: {faq.get('name', '')[:80]}...")
-                    print(f"    A: {faq.get('acceptedAnswer', {}).get('text', '')[:80]}...")
+                    out.append(f"\n  FAQ {i}:")
+                    out.append(f"    Q: {faq.get('name', '')[:80]}...")
+                    out.append(f"    A: {faq.get('acceptedAnswer', {}).get('text', '')[:80]}...")
                     
             elif node.get('@type') == 'BreadcrumbList':
-                print("\n🍞 BREADCRUMB DATA:")
+                out.append("\n🍞 BREADCRUMB DATA:")
                 items = node.get('itemListElement', [])
                 for item in items:
-                    print(f"  {item.get('position')}. {item.get('name')} -> {item.get('item')}")
+                    out.append(f"  {item.get('position')}. {item.get('name')} -> {item.get('item')}")
                     
             elif node.get('@type') == 'ProfessionalService':
-                print("\n🏢 PROFESSIONAL SERVICE DATA:")
-                print(f"  • Name: {node.get('name')}")
+                out.append("\n🏢 PROFESSIONAL SERVICE DATA:")
+                out.append(f"  • Name: {node.get('name')}")
                 if 'telephone' in node:
-                    print(f"  • Phone: {node.get('telephone')}")
+                    out.append(f"  • Phone: {node.get('telephone')}")
                 if 'address' in node:
-                    print(f"  • Address: {node['address'].get('streetAddress', 'Not found')}")
+                    out.append(f"  • Address: {node['address'].get('streetAddress', 'Not found')}")
                 if 'openingHoursSpecification' in node:
                     hours = node['openingHoursSpecification']
-                    print(f"  • Hours: {hours.get('opens')} - {hours.get('closes')}")
+                    out.append(f"  • Hours: {hours.get('opens')} - {hours.get('closes')}")
                     
-        print("\n" + "=" * 70)
-        print(f"📊 Total Schema Size: {len(json.dumps(schema))} characters")
-        print(f"✅ Using REAL data from the website, not mockup!")
-        print("=" * 70)
+        out.append("\n" + "=" * 70)
+        out.append(f"📊 Total Schema Size: {len(json.dumps(schema))} characters")
+        out.append(f"✅ Using REAL data from the website, not mockup!")
+        out.append("=" * 70)
 else:
-    print(f"Error: {response.status_code}")
\ No newline at end of file
+    out.append(f"Error: {response.status_code}")
+
+print("\n".join(out))
\ No newline at end of file
@@ -21,52 +21,55 @@ def test_real_website():
         timeout=30
     )
     
+    out = []
     if response.status_code == 200:
         data = response.json()
         result = data['results'][0]
         
-        print(f"\n✅ Has existing schema: {result['has_schema']}")
-        print(f"📊 Score: {result['score']}/100")
-        print(f"🤖 AI Optimized: {result['ai_search_optimized']}")
+        out.append(f"\n✅ Has existing schema: {result['has_schema']}")
+        out.append(f"📊 Score: {result['score']}/100")
+        out.append(f"🤖 AI Optimized: {result['ai_search_optimized']}")
         
         if result.get('generated_schema'):
-            print("\n🚀 Generated SEO 2025 Optimized Schema:")
-            print("-" * 40)
+            out.append("\n🚀 Generated SEO 2025 Optimized Schema:")
+            out.append("-" * 40)
             
             schema = result['generated_schema']
             
             # Check structure
             if '@graph' in schema:
-                print(f"✓ Graph-based structure with {len(schema['@graph'])} nodes")
+                out.append(f"✓ Graph-based structure with {len(schema['@graph'])} nodes")
                 
                 # List all schema types
                 for node in schema['@graph']:
                     if '@type' in node:
-                        print(f"  • {node['@type']} Schema")
+                        out.append(f"  • {node['@type']} Schema")
                         
                         # Show key features
                         if node['@type'] == 'Organization':
-                            print("    - E-E-A-T publisher signals")
-                            print("    - Contact information")
-                            print("    - Social media links")
+                            out.append("    - E-E-A-T publisher signals")
+                            out.append("    - Contact information")
+                            out.append("    - Social media links")
                         elif node['@type'] == 'WebSite':
-                            print("    - SearchAction for sitelinks")
-                            print("    - Language specification")
+                            out.append("    - SearchAction for sitelinks")
+                            out.append("    - Language specification")
                         elif node['@type'] == 'BreadcrumbList':
-                            print("    - Navigation hierarchy")
+                            out.append("    - Navigation hierarchy")
                         elif node['@type'] in ['Article', 'BlogPosting']:
-                            print("    - Author expertise signals")
-                            print("    - Speakable for voice search")
-                            print("    - Accessibility features")
+                            out.append("    - Author expertise signals")
+                            out.append("    - Speakable for voice search")
+                            out.append("    - Accessibility features")
             
-            print("\n📝 Schema Script (first 500 chars):")
+            out.append("\n📝 Schema Script (first 500 chars):")
             script = json.dumps(schema, indent=2)[:500]
-            print(script)
+            out.append(script)
             
-            print(f"\n📏 Total schema size: {len(json.dumps(schema))} characters")
+            out.append(f"\n📏 Total schema size: {len(json.dumps(schema))} characters")
             
     else:
-        print(f"Error: {response.status_code}")
+        out.append(f"Error: {response.status_code}")
+    
+    print("\n".join(out))
 
 if __name__ == "__main__":
     test_real_website()
\ No newline at end of file
@@ -3,7 +3,56 @@
 
 import requests
 import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from typing import Dict, List
+
+# Pretty-printing the generated schema is for human inspection only
+VERBOSE = '-v' in sys.argv or '--verbose' in sys.argv
+
+def collect_keys_types(obj, keys: set, types: set):
+    """Collect every property name and @type value in a schema tree"""
+    if isinstance(obj, dict):
+        keys.update(obj)
+        node_type = obj.get('@type')
+        if isinstance(node_type, list):
+            types.update(node_type)
+        elif node_type:
+            types.add(node_type)
+        for value in obj.values():
+            collect_keys_types(value, keys, types)
+    elif isinstance(obj, list):
+        for item in obj:
+            collect_keys_types(item, keys, types)
+
+def detect_features(schema: Dict) -> List[str]:
+    """Return the SEO 2025 features present in a generated schema"""
+    features = []
+    
+    # One walk over the tree serves every check
+    keys, types = set(), set()
+    collect_keys_types(schema, keys, types)
+    
+    # Check for E-E-A-T signals
+    if 'expertise' in keys or 'knowsAbout' in keys:
+        features.append("E-E-A-T signals (expertise)")
+    if 'author' in keys and 'Person' in types:
+        features.append("Author credibility")
+    if 'Organization' in types:
+        features.append("Publisher trust signals")
+    if 'BreadcrumbList' in types:
+        features.append("Navigation context")
+    if 'FAQPage' in types:
+        features.append("FAQ for voice search")
+    if 'speakable' in keys:
+        features.append("Voice search optimization")
+    if 'SearchAction' in types:
+        features.append("Sitelinks search box")
+    if 'reviewedBy' in keys:
+        features.append("Content review signals")
+    
+    return features
 
 def test_schema_generation():
     """Test the Schema Markup Checker with the new generation function"""
@@ -20,97 +69,98 @@ def test_schema_generation():
         "https://example.com",                     # Homepage
     ]
     
-    for url in test_urls[:1]:  # Test first URL for now
-        print(f"\n🔍 Testing URL: {url}")
-        print("-" * 40)
+    # Check every URL in a single request
+    print(f"\n📤 Sending {len(test_urls)} URLs in one request")
+    
+    out = []
+    try:
+        response = requests.post(
+            "http://localhost:8000/api/check-schema-markup",
+            json={"urls": test_urls, "max_workers": len(test_urls)},
+            timeout=60
+        )
         
-        try:
-            response = requests.post(
-                "http://localhost:8000/api/check-schema-markup",
-                json={"urls": [url], "max_workers": 1},
-                timeout=30
-            )
+        if response.status_code == 200:
+            data = response.json()
+            
+            # Detect features for every generated schema in parallel; printing
+            # stays in this process so reports don't interleave
+            schemas_by_url = {
+                result['url']: result['generated_schema']
+                for result in data['results']
+                if result.get('generated_schema')
+            }
+            features_by_url = {}
+            if schemas_by_url:
+                with ProcessPoolExecutor() as executor:
+                    features_by_url = dict(zip(schemas_by_url, executor.map(detect_features, schemas_by_url.values())))
             
-            if response.status_code == 200:
-                data = response.json()
-                result = data['results'][0] if data['results'] else None
+            # Report in the order the server returned the results
+            for result in data['results']:
+                url = result['url']
+                out.append(f"\n🔍 Testing URL: {url}")
+                out.append("-" * 40)
                 
-                if result:
-                    print(f"✅ Has existing schema: {result['has_schema']}")
-                    print(f"📊 Score: {result['score']}/100")
-                    print(f"🤖 AI Optimized: {result['ai_search_optimized']}")
-                    
-                    if result['schema_types']:
-                        print(f"📝 Schema Types Found: {', '.join(result['schema_types'])}")
-                    
-                    if result['recommendations']:
-                        print("\n📋 Recommendations:")
-                        for rec in result['recommendations']:
-                            print(f"  • {rec}")
+                out.append(f"✅ Has existing schema: {result['has_schema']}")
+                out.append(f"📊 Score: {result['score']}/100")
+                out.append(f"🤖 AI Optimized: {result['ai_search_optimized']}")
+                
+                if result['schema_types']:
+                    out.append(f"📝 Schema Types Found: {', '.join(result['schema_types'])}")
+                
+                if result['recommendations']:
+                    out.append("\n📋 Recommendations:")
+                    for rec in result['recommendations']:
+                        out.append(f"  • {rec}")
+                
+                if result.get('generated_schema'):
+                    schema = result['generated_schema']
                     
-                    if result.get('generated_schema'):
-                        print("\n🚀 Generated Schema (SEO 2025 Optimized):")
-                        print("-" * 40)
+                    if VERBOSE:
+                        out.append("\n🚀 Generated Schema (SEO 2025 Optimized):")
+                        out.append("-" * 40)
                         
                         # Pretty print the generated schema
-                        schema_json = json.dumps(result['generated_schema'], indent=2, ensure_ascii=False)
+                        schema_json = json.dumps(schema, indent=2, ensure_ascii=False)
                         
                         # Show first 1000 characters
                         if len(schema_json) > 1000:
-                            print(schema_json[:1000])
-                            print(f"\n... (truncated, total {len(schema_json)} characters)")
+                            out.append(schema_json[:1000])
+                            out.append(f"\n... (truncated, total {len(schema_json)} characters)")
                         else:
-                            print(schema_json)
-                        
-                        # Analyze the generated schema
-                        print("\n📈 Schema Analysis:")
-                        schema = result['generated_schema']
-                        
-                        if '@graph' in schema:
-                            print(f"  • Graph nodes: {len(schema['@graph'])}")
-                            types = [node.get('@type') for node in schema['@graph'] if '@type' in node]
-                            print(f"  • Schema types: {', '.join(types)}")
-                        
-                        print("\n✨ SEO 2025 Features:")
-                        features = []
-                        
-                        # Check for E-E-A-T signals
-                        schema_str = json.dumps(schema)
-                        if 'expertise' in schema_str or 'knowsAbout' in schema_str:
-                            features.append("E-E-A-T signals (expertise)")
-                        if 'author' in schema_str and 'Person' in schema_str:
-                            features.append("Author credibility")
-                        if 'Organization' in schema_str:
-                            features.append("Publisher trust signals")
-                        if 'BreadcrumbList' in schema_str:
-                            features.append("Navigation context")
-                        if 'FAQPage' in schema_str:
-                            features.append("FAQ for voice search")
-                        if 'speakable' in schema_str:
-                            features.append("Voice search optimization")
-                        if 'SearchAction' in schema_str:
-                            features.append("Sitelinks search box")
-                        if 'reviewedBy' in schema_str:
-                            features.append("Content review signals")
-                        
-                        for feature in features:
-                            print(f"  ✓ {feature}")
-                        
-                        print(f"\n🎯 Total SEO 2025 features: {len(features)}/8")
-                        
-                    else:
-                        print("\n⚠️ No schema generated")
-                        
-            else:
-                print(f"❌ Error: Status {response.status_code}")
-                print(response.text)
-                
-        except Exception as e:
-            print(f"❌ Error testing URL: {e}")
+                            out.append(schema_json)
+                    
+                    # Analyze the generated schema
+                    out.append("\n📈 Schema Analysis:")
+                    
+                    if '@graph' in schema:
+                        out.append(f"  • Graph nodes: {len(schema['@graph'])}")
+                        types = [node.get('@type') for node in schema['@graph'] if '@type' in node]
+                        out.append(f"  • Schema types: {', '.join(types)}")
+                    
+                    out.append("\n✨ SEO 2025 Features:")
+                    features = features_by_url[url]
+                    
+                    for feature in features:
+                        out.append(f"  ✓ {feature}")
+                    
+                    out.append(f"\n🎯 Total SEO 2025 features: {len(features)}/8")
+                    
+                else:
+                    out.append("\n⚠️ No schema generated")
+                    
+        else:
+            out.append(f"❌ Error: Status {response.status_code}")
+            out.append(response.text)
+            
+    except Exception as e:
+        out.append(f"❌ Error testing URLs: {e}")
     
-    print("\n" + "=" * 60)
-    print("Test Complete!")
-    print("=" * 60)
+    out.append("\n" + "=" * 60)
+    out.append("Test Complete!")
+    out.append("=" * 60)
+    print("\n".join(out))
 
 if __name__ == "__main__":
+    # Pass -v / --verbose to also print the generated schema
     test_schema_generation()
\ No newline at end of file
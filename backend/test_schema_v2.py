@@ -4,11 +4,50 @@ Test Schema Generator V2 with example input/output
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import sys
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+
+# One keep-alive session shared by every test request
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.headers.update({"Content-Type": "application/json"})
+
+def wait_for_server(timeout: float = 5.0) -> bool:
+    """Poll the API with exponential backoff until it accepts connections"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        try:
+            # Any HTTP response (even 405 for HEAD) means the server is up
+            SESSION.head("http://localhost:8000/", timeout=0.2)
+            return True
+        except requests.exceptions.RequestException:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+def encode_brand(brand_profile: dict) -> bytes:
+    """Encode a brand profile as an open JSON object ready for compose()"""
+    return orjson.dumps({"brand_profile": brand_profile})[:-1]
+
+def compose(brand_blob: bytes, page_spec: dict) -> bytes:
+    """Join a pre-encoded brand block and a page spec into a request body"""
+    return brand_blob + b',"page_spec":' + orjson.dumps(page_spec) + b'}'
+
+def parse_jsonld(jsonld: str) -> dict:
+    """Parse a generated JSON-LD block once, stripping its <script> wrapper"""
+    json_str = jsonld.strip().removeprefix('<script type="application/ld+json">').removesuffix('</script>')
+    return orjson.loads(json_str)
 
 def test_service_page():
     """Test with Service page example from spec"""
     
+    out = []
+    
     test_data = {
         "brand_profile": {
             "base_url": "https://www.wowwam-gemstones.com",
@@ -48,56 +87,59 @@ def test_service_page():
         }
     }
     
-    print("=" * 70)
-    print("🚀 Testing Schema Generator V2 - Service Page")
-    print("=" * 70)
+    out.append("=" * 70)
+    out.append("🚀 Testing Schema Generator V2 - Service Page")
+    out.append("=" * 70)
     
-    response = requests.post(
+    response = SESSION.post(
         "http://localhost:8000/api/generate-schema-v2",
-        json=test_data,
+        data=orjson.dumps(test_data),
         timeout=10
     )
     
     if response.status_code == 200:
-        result = response.json()
+        result = orjson.loads(response.content)
         
-        print("\n📊 Results:")
-        print(f"  Score: {result['score']}/100")
-        print(f"  Warnings: {len(result['warnings'])}")
-        print(f"  Errors: {len(result['errors'])}")
+        out.append("\n📊 Results:")
+        out.append(f"  Score: {result['score']}/100")
+        out.append(f"  Warnings: {len(result['warnings'])}")
+        out.append(f"  Errors: {len(result['errors'])}")
         
         if result['warnings']:
-            print("\n⚠️ Warnings:")
+            out.append("\n⚠️ Warnings:")
             for warning in result['warnings']:
-                print(f"  - {warning}")
+                out.append(f"  - {warning}")
         
         if result['errors']:
-            print("\n❌ Errors:")
+            out.append("\n❌ Errors:")
             for error in result['errors']:
-                print(f"  - {error}")
+                out.append(f"  - {error}")
         
-        print("\n📝 Generated JSON-LD:")
-        print("-" * 70)
-        print(result['jsonld'])
+        out.append("\n📝 Generated JSON-LD:")
+        out.append("-" * 70)
+        out.append(result['jsonld'])
         
         # Parse and validate structure
         if '<script' in result['jsonld']:
-            json_str = result['jsonld'].replace('<script type="application/ld+json">', '').replace('</script>', '').strip()
             try:
-                parsed = json.loads(json_str)
-                print("\n✅ JSON-LD is valid!")
-                print(f"  @graph contains {len(parsed.get('@graph', []))} nodes:")
-                for node in parsed.get('@graph', []):
-                    print(f"    - {node.get('@type')} ({node.get('@id', 'no-id')})")
+                graph = parse_jsonld(result['jsonld']).get('@graph', [])
+                out.append("\n✅ JSON-LD is valid!")
+                out.append(f"  @graph contains {len(graph)} nodes:")
+                for node in graph:
+                    out.append(f"    - {node.get('@type')} ({node.get('@id', 'no-id')})")
             except:
-                print("\n❌ JSON-LD is invalid!")
+                out.append("\n❌ JSON-LD is invalid!")
     else:
-        print(f"Error: {response.status_code}")
-        print(response.text)
+        out.append(f"Error: {response.status_code}")
+        out.append(response.text)
+    
+    return "\n".join(out)
 
 def test_product_page():
     """Test with Product page"""
     
+    out = []
+    
     test_data = {
         "brand_profile": {
             "base_url": "https://www.example-shop.com",
@@ -148,44 +190,48 @@ def test_product_page():
         }
     }
     
-    print("\n" + "=" * 70)
-    print("🛍️ Testing Schema Generator V2 - Product Page")
-    print("=" * 70)
+    out.append("\n" + "=" * 70)
+    out.append("🛍️ Testing Schema Generator V2 - Product Page")
+    out.append("=" * 70)
     
-    response = requests.post(
+    response = SESSION.post(
         "http://localhost:8000/api/generate-schema-v2",
-        json=test_data,
+        data=orjson.dumps(test_data),
         timeout=10
     )
     
     if response.status_code == 200:
-        result = response.json()
+        result = orjson.loads(response.content)
         
-        print("\n📊 Results:")
-        print(f"  Score: {result['score']}/100")
-        print(f"  Warnings: {len(result['warnings'])}")
-        print(f"  Errors: {len(result['errors'])}")
+        out.append("\n📊 Results:")
+        out.append(f"  Score: {result['score']}/100")
+        out.append(f"  Warnings: {len(result['warnings'])}")
+        out.append(f"  Errors: {len(result['errors'])}")
         
         # Check for Product and Offer
         if '<script' in result['jsonld']:
-            json_str = result['jsonld'].replace('<script type="application/ld+json">', '').replace('</script>', '').strip()
-            parsed = json.loads(json_str)
+            parsed = parse_jsonld(result['jsonld'])
             
             has_product = False
             has_offer = False
             
-            for node in parsed.get('@graph', []):
+            for node in parsed.get('@graph', ()):
                 if node.get('@type') == 'Product':
                     has_product = True
                     if node.get('offers'):
                         has_offer = True
+                        break
             
-            print(f"\n✅ Has Product: {has_product}")
-            print(f"✅ Has Offer: {has_offer}")
+            out.append(f"\n✅ Has Product: {has_product}")
+            out.append(f"✅ Has Offer: {has_offer}")
+    
+    return "\n".join(out)
 
 def test_faq_page():
     """Test with FAQ page"""
     
+    out = []
+    
     test_data = {
         "brand_profile": {
             "base_url": "https://www.example.com",
@@ -234,120 +280,118 @@ def test_faq_page():
         }
     }
     
-    print("\n" + "=" * 70)
-    print("❓ Testing Schema Generator V2 - FAQ Page")
-    print("=" * 70)
+    out.append("\n" + "=" * 70)
+    out.append("❓ Testing Schema Generator V2 - FAQ Page")
+    out.append("=" * 70)
     
-    response = requests.post(
+    response = SESSION.post(
         "http://localhost:8000/api/generate-schema-v2",
-        json=test_data,
+        data=orjson.dumps(test_data),
         timeout=10
     )
     
     if response.status_code == 200:
-        result = response.json()
+        result = orjson.loads(response.content)
         
-        print("\n📊 Results:")
-        print(f"  Score: {result['score']}/100")
-        print(f"  Warnings: {len(result['warnings'])}")
-        print(f"  Errors: {len(result['errors'])}")
+        out.append("\n📊 Results:")
+        out.append(f"  Score: {result['score']}/100")
+        out.append(f"  Warnings: {len(result['warnings'])}")
+        out.append(f"  Errors: {len(result['errors'])}")
         
         if result['warnings']:
-            print("\n⚠️ Warnings:")
+            out.append("\n⚠️ Warnings:")
             for warning in result['warnings']:
-                print(f"  - {warning}")
+                out.append(f"  - {warning}")
+    
+    return "\n".join(out)
 
 def test_invalid_cases():
     """Test error handling"""
     
-    print("\n" + "=" * 70)
-    print("🔍 Testing Error Handling")
-    print("=" * 70)
+    out = []
+    
+    out.append("\n" + "=" * 70)
+    out.append("🔍 Testing Error Handling")
+    out.append("=" * 70)
+    
+    # The brand block is shared by every sub-test, so it is encoded once
+    brand_profile = {
+        "base_url": "https://www.example.com",
+        "brand_name": "Test",
+        "logo_url": "https://www.example.com/logo.png",
+        "sameas": [],
+        "languages": ["en"]
+    }
+    brand_blob = encode_brand(brand_profile)
     
     # Test 1: XML/Sitemap page
-    test_data = {
-        "brand_profile": {
-            "base_url": "https://www.example.com",
-            "brand_name": "Test",
-            "logo_url": "https://www.example.com/logo.png",
-            "sameas": [],
-            "languages": ["en"]
-        },
-        "page_spec": {
-            "page_url": "https://www.example.com/sitemap.xml",
-            "page_name": "Sitemap",
-            "breadcrumb_items": [],
-            "page_type": "generic"
-        }
+    page_spec = {
+        "page_url": "https://www.example.com/sitemap.xml",
+        "page_name": "Sitemap",
+        "breadcrumb_items": [],
+        "page_type": "generic"
     }
     
-    print("\n1. Testing XML/Sitemap rejection:")
-    response = requests.post(
+    out.append("\n1. Testing XML/Sitemap rejection:")
+    response = SESSION.post(
         "http://localhost:8000/api/generate-schema-v2",
-        json=test_data
+        data=compose(brand_blob, page_spec)
     )
     
     if response.status_code == 400:
-        print("  ✅ Correctly rejected XML page")
+        out.append("  ✅ Correctly rejected XML page")
     else:
-        print("  ❌ Should have rejected XML page")
+        out.append("  ❌ Should have rejected XML page")
     
     # Test 2: Invalid phone format
-    test_data['page_spec']['page_url'] = "https://www.example.com/test"
-    test_data['brand_profile']['phone_e164'] = "081-234-5678"  # Not E.164
+    page_spec['page_url'] = "https://www.example.com/test"
+    invalid_phone_blob = encode_brand({**brand_profile, "phone_e164": "081-234-5678"})  # Not E.164
     
-    print("\n2. Testing invalid phone format:")
-    response = requests.post(
+    out.append("\n2. Testing invalid phone format:")
+    response = SESSION.post(
         "http://localhost:8000/api/generate-schema-v2",
-        json=test_data
+        data=compose(invalid_phone_blob, page_spec)
     )
     
     if response.status_code == 200:
-        result = response.json()
+        result = orjson.loads(response.content)
         if any("E.164" in w for w in result.get('warnings', [])):
-            print("  ✅ Correctly warned about phone format")
+            out.append("  ✅ Correctly warned about phone format")
     
     # Test 3: Product without price
-    test_data = {
-        "brand_profile": {
-            "base_url": "https://www.example.com",
-            "brand_name": "Test",
-            "logo_url": "https://www.example.com/logo.png",
-            "sameas": [],
-            "languages": ["en"]
-        },
-        "page_spec": {
-            "page_url": "https://www.example.com/product",
-            "page_name": "Product",
-            "breadcrumb_items": [],
-            "page_type": "product"
-            # Missing product data!
-        }
+    page_spec = {
+        "page_url": "https://www.example.com/product",
+        "page_name": "Product",
+        "breadcrumb_items": [],
+        "page_type": "product"
+        # Missing product data!
     }
     
-    print("\n3. Testing Product without data:")
-    response = requests.post(
+    out.append("\n3. Testing Product without data:")
+    response = SESSION.post(
         "http://localhost:8000/api/generate-schema-v2",
-        json=test_data
+        data=compose(brand_blob, page_spec)
     )
     
     if response.status_code == 200:
-        result = response.json()
+        result = orjson.loads(response.content)
         if result.get('errors'):
-            print("  ✅ Correctly reported missing product data")
+            out.append("  ✅ Correctly reported missing product data")
+    
+    return "\n".join(out)
 
 if __name__ == "__main__":
-    import time
+    # Pass --wait when the server may still be starting up
+    if '--wait' in sys.argv and not wait_for_server():
+        print("❌ Server at http://localhost:8000 did not become ready")
+        sys.exit(1)
     
-    # Wait for server to be ready
-    time.sleep(2)
-    
-    # Run all tests
-    test_service_page()
-    test_product_page()
-    test_faq_page()
-    test_invalid_cases()
+    # Run all tests in parallel; each returns its report so output stays in order
+    tests = [test_service_page, test_product_page, test_faq_page, test_invalid_cases]
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        for report in executor.map(lambda test: test(), tests):
+            print(report)
     
     print("\n" + "=" * 70)
     print("✅ All tests completed!")
-    print("=" * 70)
\ No newline at end of file
+    print("=" * 70)
@@ -1,19 +1,51 @@
 #!/usr/bin/env python3
+import asyncio
 import csv
-import requests
+import aiohttp
 import time
 from urllib.parse import urlparse
 from datetime import datetime
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import orjson
+from itertools import zip_longest
+import queue
 import threading
 
-def check_url(url, timeout=10):
+# Checks are almost pure network wait; coroutines are cheap enough to keep
+# many more requests in flight than a thread pool could
+MAX_WORKERS = 100
+# ...but any single site only ever sees this many concurrent connections
+MAX_PER_HOST = 8
+# Workers start staggered so hosts don't see a burst at start
+STAGGER_STEP = 0.1
+# Progress is printed (and the CSV flushed) once per this many results
+PROGRESS_EVERY = 25
+
+FIELDNAMES = ['original_url', 'status_code', 'final_url', 'is_404', 'error', 'checked_at']
+
+# (epoch second, ISO string) of the last timestamp handed out
+_last_timestamp = [0, '']
+
+def now_iso():
+    """Return the current time in ISO format, formatting it at most once per second"""
+    second = int(time.time())
+    if second != _last_timestamp[0]:
+        _last_timestamp[0] = second
+        _last_timestamp[1] = datetime.fromtimestamp(second).isoformat()
+    return _last_timestamp[1]
+
+async def check_url(session, url, timeout=10):
     """Check if URL returns 404 or other errors"""
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
     try:
-        response = requests.get(url, timeout=timeout, allow_redirects=True)
-        status_code = response.status_code
-        final_url = response.url
+        # HEAD is enough to read the status; fall back to a GET whose body is
+        # never read for servers that don't implement HEAD
+        async with session.head(url, timeout=client_timeout, allow_redirects=True) as response:
+            status_code = response.status
+            final_url = str(response.url)
+        if status_code in (405, 501):
+            async with session.get(url, timeout=client_timeout, allow_redirects=True) as response:
+                status_code = response.status
+                final_url = str(response.url)
         
         return {
             'original_url': url,
@@ -21,16 +53,16 @@ def check_url(url, timeout=10):
             'final_url': final_url,
             'is_404': status_code == 404,
             'error': None,
-            'checked_at': datetime.now().isoformat()
+            'checked_at': now_iso()
         }
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         return {
             'original_url': url,
             'status_code': None,
             'final_url': None,
             'is_404': False,
-            'error': str(e),
-            'checked_at': datetime.now().isoformat()
+            'error': f"{type(e).__name__}: {e}" if str(e) else type(e).__name__,
+            'checked_at': now_iso()
         }
 
 def read_csv(file_path):
@@ -43,58 +75,92 @@ def read_csv(file_path):
                 urls.append(row['URL'])
     return urls
 
-def check_urls_batch(urls, max_workers=10):
-    """Check multiple URLs concurrently"""
-    results = []
-    total = len(urls)
-    completed = 0
-    lock = threading.Lock()
-    
-    def update_progress():
-        nonlocal completed
-        with lock:
-            completed += 1
-            print(f"Progress: {completed}/{total} ({completed*100/total:.1f}%)")
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(check_url, url): url for url in urls}
+def interleave_by_host(urls):
+    """Order URLs round-robin across hosts so neighbours rarely share a host"""
+    by_host = {}
+    for url in urls:
+        by_host.setdefault(urlparse(url).netloc, []).append(url)
+    return [url for group in zip_longest(*by_host.values()) for url in group if url is not None]
+
+async def check_worker(worker_id, session, url_iter, result_queue):
+    """Check URLs from the shared iterator and hand each result to the writer"""
+    await asyncio.sleep(STAGGER_STEP * (worker_id % 5))
+    for url in url_iter:
+        result_queue.put(await check_url(session, url))
+
+async def check_urls_async(urls, result_queue, max_workers):
+    """Run a fixed pool of check workers over one keep-alive client session"""
+    connector = aiohttp.TCPConnector(limit=max_workers, limit_per_host=MAX_PER_HOST)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Workers share one iterator, so each URL is checked exactly once
+        url_iter = iter(interleave_by_host(urls))
+        await asyncio.gather(*(
+            check_worker(worker_id, session, url_iter, result_queue)
+            for worker_id in range(max_workers)
+        ))
+
+def write_results(result_queue, output_file, total, summary):
+    """Drain checked URLs from the queue, streaming CSV/JSONL rows and reporting progress"""
+    json_file = output_file.replace('.csv', '.jsonl')
+    with open(output_file, 'w', newline='', encoding='utf-8') as f, \
+            open(json_file, 'wb') as jf:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
         
-        for future in as_completed(future_to_url):
-            result = future.result()
-            results.append(result)
-            update_progress()
+        while True:
+            result = result_queue.get()
+            if result is None:
+                break
             
+            writer.writerow(result)
+            jf.write(orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE))
+            
+            # Only the counts and the rows the report lists are kept in memory
+            summary['total'] += 1
             if result['is_404']:
+                summary['not_found'].append(result['original_url'])
                 print(f"✗ 404 Found: {result['original_url']}")
             elif result['error']:
+                summary['errors'].append((result['original_url'], result['error']))
                 print(f"✗ Error: {result['original_url']} - {result['error']}")
-            elif result['status_code'] != 200:
+            elif result['status_code'] == 200:
+                summary['status_200'] += 1
+            else:
                 print(f"⚠ Status {result['status_code']}: {result['original_url']}")
+            
+            completed = summary['total']
+            if completed % PROGRESS_EVERY == 0 or completed == total:
+                print(f"Progress: {completed}/{total} ({completed*100/total:.1f}%)")
+                f.flush()
+                jf.flush()
     
-    return results
-
-def save_results(results, output_file):
-    """Save results to JSON and CSV files"""
-    # Save to JSON
-    json_file = output_file.replace('.csv', '.json')
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nResults saved to: {output_file} and {json_file}")
+
+def check_urls_batch(urls, output_file, max_workers=MAX_WORKERS):
+    """Check multiple URLs concurrently, streaming results to the output files"""
+    summary = {'total': 0, 'status_200': 0, 'not_found': [], 'errors': []}
     
-    # Save to CSV
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['original_url', 'status_code', 'final_url', 'is_404', 'error', 'checked_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+    # Workers only enqueue results; one writer thread owns the files and stdout
+    result_queue = queue.Queue()
+    writer_thread = threading.Thread(
+        target=write_results, args=(result_queue, output_file, len(urls), summary)
+    )
+    writer_thread.start()
     
-    print(f"\nResults saved to: {output_file} and {json_file}")
+    try:
+        asyncio.run(check_urls_async(urls, result_queue, max_workers))
+    finally:
+        result_queue.put(None)
+        writer_thread.join()
+    
+    return summary
 
-def generate_report(results):
+def generate_report(summary):
     """Generate summary report"""
-    total = len(results)
-    status_404 = sum(1 for r in results if r['is_404'])
-    errors = sum(1 for r in results if r['error'])
-    status_200 = sum(1 for r in results if r['status_code'] == 200)
+    total = summary['total']
+    status_404 = len(summary['not_found'])
+    errors = len(summary['errors'])
+    status_200 = summary['status_200']
     other_status = total - status_404 - errors - status_200
     
     report = f"""
@@ -110,15 +176,13 @@ Results:
 404 URLs:
 """
     
-    for r in results:
-        if r['is_404']:
-            report += f"  - {r['original_url']}\n"
+    for url in summary['not_found']:
+        report += f"  - {url}\n"
     
     if errors > 0:
         report += "\nFailed URLs (connection errors):\n"
-        for r in results:
-            if r['error']:
-                report += f"  - {r['original_url']}: {r['error']}\n"
+        for url, error in summary['errors']:
+            report += f"  - {url}: {error}\n"
     
     return report
 
@@ -130,17 +194,15 @@ def main():
     urls = read_csv(csv_file)
     print(f"Found {len(urls)} URLs to check\n")
     
-    print("Starting URL checks (using 10 concurrent workers)...")
+    print(f"Starting URL checks (using {MAX_WORKERS} concurrent workers)...")
     start_time = time.time()
     
-    results = check_urls_batch(urls, max_workers=10)
+    summary = check_urls_batch(urls, output_file, max_workers=MAX_WORKERS)
     
     elapsed_time = time.time() - start_time
     print(f"\nCompleted in {elapsed_time:.1f} seconds")
     
-    save_results(results, output_file)
-    
-    report = generate_report(results)
+    report = generate_report(summary)
     print(report)
     
     # Save report to file